@@ -0,0 +1,141 @@
+"""
+Bulk parsing of whitespace-separated integers, for big puzzle inputs.
+
+    left, right = bulkparse.parse_columns(text, 2)
+    values, offsets = bulkparse.parse_ragged(text)
+
+The input buffer is split into chunks at newline boundaries, and the chunks
+are parsed in a process pool when the input is big enough to make that
+worthwhile.  With numpy installed, each chunk is parsed straight into an
+int64 array without creating a python object per number, and the results
+are numpy arrays; without it, they're array('q') buffers.
+
+parse_columns() returns one array per column.  parse_ragged() returns
+the rows of a table whose rows have different lengths, as a flat array of
+values and an array of offsets: row i is values[offsets[i]:offsets[i+1]].
+Blank lines are skipped.
+"""
+from typing import Optional, Sequence, Union
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Inputs smaller than this are parsed in this process.
+PARALLEL_MIN_BYTES = 8 * 2**20
+
+Buffer = Union[str, bytes]
+
+
+def split_chunks(data: bytes, nchunks: int) -> list[bytes]:
+    """Split the data into about nchunks pieces, each ending at a newline."""
+    size = max(1, len(data) // max(1, nchunks))
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start + size)
+        end = len(data) if end < 0 else end + 1
+        chunks.append(data[start:end])
+        start = end
+    return chunks
+
+
+def _parse_values(chunk: bytes):
+    if np is not None:
+        if chunk.isspace():
+            return np.zeros(0, dtype=np.int64)
+        return np.fromstring(chunk, dtype=np.int64, sep=" ")
+    return array("q", map(int, chunk.split()))
+
+
+def _parse_rows(chunk: bytes):
+    """Parse a chunk into its values and the number of values on each
+    non-blank line."""
+    if np is None:
+        values, lengths = array("q"), array("q")
+        for line in chunk.splitlines():
+            tokens = line.split()
+            if tokens:
+                values.extend(map(int, tokens))
+                lengths.append(len(tokens))
+        return values, lengths
+
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    if not len(buf):
+        return _parse_values(chunk), np.zeros(0, dtype=np.int64)
+    in_token = buf > ord(" ")
+    starts = in_token.copy()
+    starts[1:] &= ~in_token[:-1]
+    line_no = np.cumsum(buf == ord("\n"), dtype=np.int32)
+    lengths = np.bincount(line_no[starts], minlength=int(line_no[-1]) + 1)
+    return _parse_values(chunk), lengths[lengths > 0]
+
+
+def _concat(parts: Sequence):
+    if np is not None:
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+    result = array("q")
+    for part in parts:
+        result.extend(part)
+    return result
+
+
+def _map_chunks(func, data: bytes, workers: Optional[int]) -> list:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(data) < PARALLEL_MIN_BYTES:
+        return [func(data)]
+    chunks = split_chunks(data, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, chunks))
+
+
+def _as_bytes(data: Buffer) -> bytes:
+    return data.encode() if isinstance(data, str) else data
+
+
+def parse_values(data: Buffer, workers: Optional[int] = None):
+    """Parse all of the integers in the data, in order, into one array."""
+    return _concat(_map_chunks(_parse_values, _as_bytes(data), workers))
+
+
+def _parse_table(data: Buffer, workers: Optional[int]) -> tuple:
+    """Parse the data into its values and the number of values on each
+    non-blank line."""
+    parts = _map_chunks(_parse_rows, _as_bytes(data), workers)
+    values = _concat([part[0] for part in parts])
+    lengths = _concat([part[1] for part in parts])
+    return values, lengths
+
+
+def parse_columns(data: Buffer, ncols: int, workers: Optional[int] = None) -> list:
+    """Parse a table of integers with ncols on every line, into an array
+    for each column."""
+    values, lengths = _parse_table(data, workers)
+    if np is not None:
+        ragged = bool(np.any(lengths != ncols))
+    else:
+        ragged = any(length != ncols for length in lengths)
+    if ragged:
+        raise ValueError(f"Expected {ncols} integers on every line")
+    if np is not None:
+        table = values.reshape(-1, ncols)
+        return [table[:, col] for col in range(ncols)]
+    return [values[col::ncols] for col in range(ncols)]
+
+
+def parse_ragged(data: Buffer, workers: Optional[int] = None) -> tuple:
+    """Parse lines with varying numbers of integers into (values, offsets)."""
+    values, lengths = _parse_table(data, workers)
+    if np is not None:
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+    else:
+        offsets = array("q", [0])
+        for length in lengths:
+            offsets.append(offsets[-1] + length)
+    return values, offsets
+
@@ -2,15 +2,39 @@
 #
 #  Advent of Code 2024 - Day 1
 #
-from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
+from typing import Sequence, Iterator, Union, Optional, Any, Dict, List, Tuple
 from pathlib import Path
 from collections import defaultdict
 from dataclasses import dataclass
 from pprint import pprint
+from array import array
+from itertools import accumulate
+import heapq
 import math
 import re
+import sys
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import bulkparse
 
 INPUTFILE = "input.txt"
+ANSWER1 = 1590491
+ANSWER2 = 22588371
+
+# Input files larger than this are solved out of core by solve_file(),
+# spilling sorted runs of RUN_SIZE rows to temporary files.
+IN_MEMORY_MAX_BYTES = 256 * 2**20
+RUN_SIZE = 2_000_000
+
+# Counting sort replaces the comparison sort when the location IDs span no
+# more than COUNTING_RANGE_FACTOR distinct values per row.
+COUNTING_RANGE_FACTOR = 4
 
 SAMPLE_CASES = [
     (
@@ -86,9 +110,277 @@ def load_lists(lines) -> Tuple[list[int], list[int]]:
         # print(f">> load a: {a}  b: {b}")
     return left, right
 
+def load_arrays(lines) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Parse both columns in bulk, into a pair of int64 arrays."""
+    left, right = bulkparse.parse_columns("\n".join(lines), 2)
+    return left, right
+
+def count_columns(left, right) -> Optional[Tuple[int, list[int], list[int]]]:
+    """Return the lowest value and the histograms of both columns over their
+    shared range of values, or None if the range is too wide for counting to
+    beat sorting."""
+    if not left:
+        return None
+    lo = min(min(left), min(right))
+    size = max(max(left), max(right)) - lo + 1
+    if size > COUNTING_RANGE_FACTOR * len(left):
+        return None
+    left_counts, right_counts = [0] * size, [0] * size
+    for a in left:
+        left_counts[a - lo] += 1
+    for b in right:
+        right_counts[b - lo] += 1
+    return lo, left_counts, right_counts
+
+def bincount_columns(left, right) -> Optional[Tuple[int, "np.ndarray", "np.ndarray"]]:
+    """Like count_columns(), for numpy arrays."""
+    if not len(left):
+        return None
+    lo = int(min(left.min(), right.min()))
+    size = int(max(left.max(), right.max())) - lo + 1
+    if size > COUNTING_RANGE_FACTOR * len(left):
+        return None
+    return lo, np.bincount(left - lo, minlength=size), np.bincount(right - lo, minlength=size)
+
+def counted_distance(left_counts, right_counts) -> int:
+    """Return the total distance between the paired-up sorted columns, given
+    their histograms.  The step from each value to the next is crossed by
+    as many pairs as the columns' running counts differ at that value."""
+    return sum(
+        abs(m - n) for m, n in zip(accumulate(left_counts), accumulate(right_counts))
+    )
+
+def counted_similarity(lo: int, left_counts, right_counts) -> int:
+    """Return the similarity score, given the histograms of both columns."""
+    return sum(
+        (lo + i) * m * n
+        for i, (m, n) in enumerate(zip(left_counts, right_counts)) if m and n
+    )
+
+def solve2_vectorized(lines: Lines) -> int:
+    """Solve the problem, with numpy."""
+    left, right = load_arrays(lines)
+    if not len(left):
+        return 0
+    counts = bincount_columns(left, right)
+    if counts is not None:
+        lo, left_counts, right_counts = counts
+        # Sum the products as python ints, which can't overflow.
+        common = np.flatnonzero(left_counts * right_counts)
+        return sum(
+            (lo + i) * m * n for i, m, n in zip(
+                common.tolist(), left_counts[common].tolist(), right_counts[common].tolist()
+            )
+        )
+    lvals, lcounts = np.unique(left, return_counts=True)
+    rvals, rcounts = np.unique(right, return_counts=True)
+    idx = np.searchsorted(rvals, lvals)
+    idx[idx == len(rvals)] = 0
+    found = rvals[idx] == lvals
+    # Sum the products as python ints, which can't overflow.
+    return sum(
+        a * m * n for a, m, n in zip(
+            lvals[found].tolist(), lcounts[found].tolist(), rcounts[idx[found]].tolist()
+        )
+    )
+
+def solve_vectorized(lines: Lines) -> int:
+    """Solve the problem, with numpy."""
+    left, right = load_arrays(lines)
+    counts = bincount_columns(left, right)
+    if counts is not None:
+        _, left_counts, right_counts = counts
+        return int(np.abs(np.cumsum(left_counts) - np.cumsum(right_counts)).sum())
+    return int(np.abs(np.sort(left) - np.sort(right)).sum())
+
+def write_run(values: list[int], path: Path) -> Path:
+    """Sort the values and write them to a binary file of int64s."""
+    values.sort()
+    with path.open("wb") as fp:
+        array("q", values).tofile(fp)
+    return path
+
+def read_run(path: Path, chunk: int = 65536) -> Iterator[int]:
+    """Stream the values back out of a file written by write_run()."""
+    with path.open("rb") as fp:
+        while True:
+            buf = array("q")
+            buf.frombytes(fp.read(chunk * buf.itemsize))
+            if not buf:
+                return
+            yield from buf
+
+def spill_sorted_runs(
+    infile: str, tmpdir: Path, run_size: int = RUN_SIZE
+) -> Tuple[list[Path], list[Path]]:
+    """Read the location lists, writing each run of run_size rows of each
+    column to its own sorted temporary file."""
+    left_runs, right_runs = [], []
+    left, right = [], []
+    with open(infile) as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            a, b = line.split()
+            left.append(int(a))
+            right.append(int(b))
+            if len(left) == run_size:
+                left_runs.append(write_run(left, tmpdir / f"left{len(left_runs)}"))
+                right_runs.append(write_run(right, tmpdir / f"right{len(right_runs)}"))
+                left, right = [], []
+    if left:
+        left_runs.append(write_run(left, tmpdir / f"left{len(left_runs)}"))
+        right_runs.append(write_run(right, tmpdir / f"right{len(right_runs)}"))
+    return left_runs, right_runs
+
+def solve_external(infile: str, run_size: int = RUN_SIZE) -> int:
+    """Solve the problem for location lists too big to sort in memory.
+    Each column is sorted in runs on disk, and the runs of both columns are
+    then merged in lockstep, so at most run_size rows are held at once."""
+    total = 0
+    with tempfile.TemporaryDirectory() as tmpdir:
+        left_runs, right_runs = spill_sorted_runs(infile, Path(tmpdir), run_size)
+        left = heapq.merge(*[read_run(path) for path in left_runs])
+        right = heapq.merge(*[read_run(path) for path in right_runs])
+        for a, b in zip(left, right):
+            total += abs(a - b)
+    return total
+
+def solve_file(infile: str) -> int:
+    """Solve the problem for an input file of any size."""
+    if Path(infile).stat().st_size > IN_MEMORY_MAX_BYTES:
+        return solve_external(infile)
+    return solve(load_input(infile))
+
+
+class RunningDistance:
+    """A RunningDistance keeps track of the part 1 distance between two lists
+    of IDs, as IDs are added to and removed from either list.
+
+    If D(t) is the number of left IDs <= t minus the number of right IDs <= t,
+    then, when the lists have the same length, the distance between their
+    sorted pairs is the sum of |D(t)| over all t.  Adding a left ID a adds 1
+    to D(t) for every t >= a, which changes the sum by the number of those t
+    with D(t) >= 0, less the number with D(t) < 0.
+
+    The range of ID values [lo, hi) is split into blocks, each with a lazy
+    offset, a histogram of its (un-offset) D values and a count of its
+    negative D values.  That makes each update O(sqrt(hi - lo)).
+    """
+
+    def __init__(self, lo: int, hi: int):
+        self.lo, self.hi = lo, hi
+        self.block = max(1, math.isqrt(hi - lo))
+        nblocks = (hi - lo + self.block - 1) // self.block
+        self.base = [0] * (hi - lo)
+        self.offset = [0] * nblocks
+        self.hist = [defaultdict(int) for _ in range(nblocks)]
+        for b in range(nblocks):
+            self.hist[b][0] = min(self.block, hi - lo - b * self.block)
+        self.negative = [0] * nblocks
+        self.total = 0
+
+    def _add_one(self, i: int, delta: int) -> None:
+        b = i // self.block
+        old = self.base[i] + self.offset[b]
+        new = old + delta
+        self.total += abs(new) - abs(old)
+        self.hist[b][self.base[i]] -= 1
+        self.base[i] += delta
+        self.hist[b][self.base[i]] += 1
+        self.negative[b] += (new < 0) - (old < 0)
+
+    def _add_block(self, b: int, delta: int) -> None:
+        size = min(self.block, self.hi - self.lo - b * self.block)
+        offset = self.offset[b]
+        if delta > 0:
+            self.total += size - 2 * self.negative[b]
+            self.negative[b] -= self.hist[b].get(-1 - offset, 0)
+        else:
+            zeros = self.hist[b].get(-offset, 0)
+            self.total += 2 * (self.negative[b] + zeros) - size
+            self.negative[b] += zeros
+        self.offset[b] += delta
+
+    def add(self, value: int, delta: int) -> None:
+        """Add delta (1 or -1) to D(t) for every t >= value."""
+        if not self.lo <= value < self.hi:
+            raise ValueError(f"ID {value} is outside the range [{self.lo}, {self.hi})")
+        i, end = value - self.lo, self.hi - self.lo
+        while i < end and i % self.block:
+            self._add_one(i, delta)
+            i += 1
+        nblocks = (end + self.block - 1) // self.block
+        for b in range((i + self.block - 1) // self.block, nblocks):
+            self._add_block(b, delta)
+
+
+class LocationLists:
+    """A LocationLists holds the running state of a pair of location lists
+    that change over time: the counts of each ID in both lists, the
+    similarity score (part 2), and the sorted-pair distance (part 1).
+    The score is updated in O(1) for each ID that's added or removed."""
+
+    def __init__(self, lo: int = 0, hi: int = 100_000):
+        self.left: dict[int, int] = defaultdict(int)
+        self.right: dict[int, int] = defaultdict(int)
+        self.nleft = self.nright = 0
+        self.similarity = 0
+        self.distances = RunningDistance(lo, hi)
+
+    @classmethod
+    def from_lines(cls, lines: Lines, lo: int = 0, hi: int = 100_000) -> "LocationLists":
+        lists = cls(lo, hi)
+        for a, b in zip(*load_lists(lines)):
+            lists.add_left(a)
+            lists.add_right(b)
+        return lists
+
+    def add_left(self, a: int) -> None:
+        self.distances.add(a, 1)
+        self.left[a] += 1
+        self.nleft += 1
+        self.similarity += a * self.right.get(a, 0)
+
+    def add_right(self, b: int) -> None:
+        self.distances.add(b, -1)
+        self.right[b] += 1
+        self.nright += 1
+        self.similarity += b * self.left.get(b, 0)
+
+    def remove_left(self, a: int) -> None:
+        if not self.left.get(a):
+            raise ValueError(f"ID {a} is not in the left list")
+        self.distances.add(a, -1)
+        self.left[a] -= 1
+        self.nleft -= 1
+        self.similarity -= a * self.right.get(a, 0)
+
+    def remove_right(self, b: int) -> None:
+        if not self.right.get(b):
+            raise ValueError(f"ID {b} is not in the right list")
+        self.distances.add(b, 1)
+        self.right[b] -= 1
+        self.nright -= 1
+        self.similarity -= b * self.left.get(b, 0)
+
+    @property
+    def distance(self) -> int:
+        if self.nleft != self.nright:
+            raise ValueError(
+                f"Lists have different lengths ({self.nleft} and {self.nright})"
+            )
+        return self.distances.total
+
+
 def solve2(lines: Lines) -> int:
     """Solve the problem."""
+    if np is not None:
+        return solve2_vectorized(lines)
     left, right = load_lists(lines)
+    counts = count_columns(left, right)
+    if counts is not None:
+        return counted_similarity(*counts)
 
     count = defaultdict(int)
     for b in right:
@@ -101,8 +393,14 @@ def solve2(lines: Lines) -> int:
 
 def solve(lines: Lines) -> int:
     """Solve the problem."""
+    if np is not None:
+        return solve_vectorized(lines)
     total = 0
     left, right = load_lists(lines)
+    counts = count_columns(left, right)
+    if counts is not None:
+        _, left_counts, right_counts = counts
+        return counted_distance(left_counts, right_counts)
     for a, b in zip(sorted(left), sorted(right)):
         # print(f"a: {a}  b: {b}")
         total += abs(a - b)
@@ -125,7 +423,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 1590491
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -145,7 +443,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 22588371
+    assert result == ANSWER2
     print("= " * 32)
 
 
@@ -2,15 +2,28 @@
 #
 #  Advent of Code 2024 - Day 2
 #
-from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
+from typing import Sequence, Iterable, Iterator, Union, Optional, Any, Dict, List, Tuple
 from pathlib import Path
 from collections import defaultdict
 from dataclasses import dataclass
 from pprint import pprint
+from array import array
+from itertools import accumulate
 import math
 import re
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import bulkparse
 
 INPUTFILE = "input.txt"
+ANSWER1 = 379
+ANSWER2 = 430
 
 SAMPLE_CASES = [
     (
@@ -97,98 +110,232 @@ def parse_sections(lines: Lines) -> Sections:
 
 # Solution
 
-def dampened_report_is_safe(levels: list[int]) -> bool:
-    # print(f"-- --  {' '.join(map(str, levels))}")
-    changes = [l2 - l1 for l1, l2 in zip(levels[:-1], levels[1:])]
-    # print(f"-- ^v  {' '.join(map(str, changes))}")
-
-    inc_dec = list_sign(changes)
-    # print(f"--- inc_dec = {inc_dec}")
-    if inc_dec == 0:
-        # print("<- not safe")
-        return False
-    if inc_dec == 1:
-        safe_changes = (1, 2, 3)
-    else:
-        safe_changes = (-1, -2, -3)
-
-    dampened = False
-    i = 0
-    while i < len(changes):
-        delta = changes[i]
-        if delta not in safe_changes:
-            if dampened:
-                # print(f"... {i}: {delta} (already dampened)")
-                return False
-            if i == 0:
-                if delta + changes[i+1] in safe_changes:
-                    # print(f"... {i}: {delta} -> {delta + changes[i+1]}  (dampened)")
-                    dampened = True
-                    i += 1
-                else:
-                    # print(f"... {i}: {delta} -> None  (dampened)")
-                    dampened = True
-            elif i < len(changes)-1:
-                if delta + changes[i-1] in safe_changes:
-                    # print(f"... {i}: {delta} -> {delta + changes[i-1]}  (dampened)")
-                    dampened = True
-                elif delta + changes[i+1] in safe_changes:
-                    # print(f"... {i}: {delta} -> {delta + changes[i+1]}  (dampened)")
-                    dampened = True
-                    i += 1
-                else:
-                    # print(f"... {i}: {delta} -> {delta + changes[i-1]} or {delta + changes[i+1]} (neither is safe)")
-                    return False
-            else:
-                # print(f"... {i}: {delta} -> None  (dampened)")
-                dampened = True
-        # else:
-        #     print(f"... {i}: {delta}")
-        i += 1
-
-    # print("<- SAFE")
-    return True
-
-def list_sign(changes: list[int]) -> int:
-    count = defaultdict(int)
-    for v in changes:
-        count[sign(v)] += 1
-        if count[sign(v)] > 2:
-            return sign(v)
-    return 0
-
-def sign(x) -> int:
-    if x > 0:
-        return 1
-    if x < 0:
-        return -1
-    return 0
+SAFE_INCREASES = (1, 2, 3)
+SAFE_DECREASES = (-1, -2, -3)
+
+def min_removals(levels: list[int], safe_changes: Tuple[int, ...], limit: int) -> int:
+    """Return the fewest levels that must be removed from the report so that
+    every change is one of the safe_changes, or some number greater than
+    limit if it takes more than that.
+
+    best[i] is the fewest removals that leave a safe run of levels ending
+    with levels[i].  Only the limit+1 levels before i can precede it in the
+    run, so this is O(n * limit).
+    """
+    n = len(levels)
+    best = [0] * n
+    for i in range(n):
+        best[i] = i
+        for j in range(max(0, i - limit - 1), i):
+            if levels[i] - levels[j] in safe_changes:
+                best[i] = min(best[i], best[j] + i - j - 1)
+    return min((best[i] + n - 1 - i for i in range(n)), default=0)
+
+def dampened_report_is_safe(levels: list[int], max_removed: int = 1) -> bool:
+    """A report is safe if removing at most max_removed levels makes it safe."""
+    if len(levels) - max_removed <= 1:
+        return True
+    for safe_changes in (SAFE_INCREASES, SAFE_DECREASES):
+        if min_removals(levels, safe_changes, max_removed) <= max_removed:
+            return True
+    return False
 
 def report_is_safe(levels: list[int]) -> bool:
     changes = [l2 - l1 for l1, l2 in zip(levels[:-1], levels[1:])]
-    if all([delta in (1, 2, 3) for delta in changes]):
+    if all([delta in SAFE_INCREASES for delta in changes]):
         return True
-    if all([delta in (-1, -2, -3) for delta in changes]):
+    if all([delta in SAFE_DECREASES for delta in changes]):
         return True
     return False
 
+def pad_reports(values: "np.ndarray", offsets: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Pack the reports into a zero-padded matrix with a row per report,
+    and return it with the length of each report."""
+    lengths = np.diff(offsets)
+    width = int(lengths.max(initial=0))
+    matrix = np.zeros((len(lengths), width), dtype=values.dtype)
+    matrix[np.arange(width) < lengths[:, None]] = values
+    return matrix, lengths
+
+def safe_steps(changes: "np.ndarray", safe_changes: Tuple[int, ...]) -> "np.ndarray":
+    return (changes >= min(safe_changes)) & (changes <= max(safe_changes))
+
+def batch_reports_are_safe(
+    matrix: "np.ndarray", lengths: "np.ndarray", dampened: bool = False
+) -> "np.ndarray":
+    """Check every report at once, returning a boolean array.
+
+    For the dampened check, prefix[:, r] says whether levels 0..r are all
+    safe steps apart, and suffix[:, r] whether levels r.. are.  Removing
+    level r then leaves a safe report if prefix[:, r-1] and suffix[:, r+1]
+    hold, and levels r-1 and r+1 are a safe step apart.
+    """
+    if matrix.shape[1] < 3:
+        matrix = np.pad(matrix, ((0, 0), (0, 3 - matrix.shape[1])))
+    nreports, width = matrix.shape
+    cols = np.arange(width)
+    real_change = cols[:-1] < (lengths[:, None] - 1)
+    changes = matrix[:, 1:] - matrix[:, :-1]
+    skips = matrix[:, 2:] - matrix[:, :-2]
+    real_skip = cols[1:-1] < (lengths[:, None] - 1)
+
+    result = np.zeros(nreports, dtype=bool)
+    for safe_changes in (SAFE_INCREASES, SAFE_DECREASES):
+        ok = safe_steps(changes, safe_changes) | ~real_change
+        if not dampened:
+            result |= ok.all(axis=1)
+            continue
+        true_col = np.ones((nreports, 1), dtype=bool)
+        prefix = np.hstack([true_col, np.logical_and.accumulate(ok, axis=1)])
+        suffix = np.hstack([np.logical_and.accumulate(ok[:, ::-1], axis=1)[:, ::-1], true_col])
+        bridge = safe_steps(skips, safe_changes) | ~real_skip
+
+        removable = np.zeros((nreports, width), dtype=bool)
+        removable[:, 0] = suffix[:, 1]
+        removable[:, 1:-1] = prefix[:, :-2] & suffix[:, 2:] & bridge
+        removable[:, -1] = prefix[:, -2]
+        removable &= cols < lengths[:, None]
+        result |= prefix[:, -1] | removable.any(axis=1)
+    return result
+
+# Integer types for packing values, narrowest first: (array typecode,
+# numpy dtype name, smallest value, largest value).
+INT_TYPES = [
+    ("b", "int8", -2**7, 2**7 - 1),
+    ("h", "int16", -2**15, 2**15 - 1),
+    ("i", "int32", -2**31, 2**31 - 1),
+    ("q", "int64", -2**63, 2**63 - 1),
+]
+
+def narrowest_type(lo: int, hi: int) -> Tuple[str, str]:
+    for code, dtype, tmin, tmax in INT_TYPES:
+        if tmin <= lo and hi <= tmax:
+            return code, dtype
+    raise ValueError(f"Values {lo}..{hi} don't fit in 64 bits")
+
+def pack(parts: list, lo: int, hi: int):
+    """Join arrays of ints into one array of the narrowest type that holds
+    values from lo to hi."""
+    code, dtype = narrowest_type(lo, hi)
+    if np is not None:
+        if not parts:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate([part.astype(dtype, copy=False) for part in parts])
+    result = array(code)
+    for part in parts:
+        result.extend(iter(part))
+    return result
+
+
+class ReportStore:
+    """A ReportStore packs a collection of reports into one buffer of the
+    narrowest integer type that holds all of their levels (usually a byte
+    each), with an array of offsets: report i is values[offsets[i]:offsets[i+1]].
+    store[i] is a zero-copy view of report i.
+
+    Reports are parsed BLOCK_BYTES of input at a time, and checked
+    BATCH_REPORTS at a time, so only the store itself and one block or batch
+    of int64s are in memory at once.
+    """
+
+    BLOCK_BYTES = 8 * 2**20
+    BATCH_REPORTS = 250_000
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Union[str, bytes]]) -> "ReportStore":
+        value_parts, length_parts = [], []
+        lo = hi = nvalues = 0
+        for block in blocks:
+            values, offsets = bulkparse.parse_ragged(block)
+            if not len(values):
+                continue
+            if np is not None:
+                block_lo, block_hi = int(values.min()), int(values.max())
+                lengths = np.diff(offsets)
+            else:
+                block_lo, block_hi = min(values), max(values)
+                lengths = [end - start for start, end in zip(offsets[:-1], offsets[1:])]
+            value_parts.append(pack([values], block_lo, block_hi))
+            length_parts.append(lengths)
+            lo, hi = min(lo, block_lo), max(hi, block_hi)
+            nvalues += len(values)
+
+        values = pack(value_parts, lo, hi)
+        code, dtype = narrowest_type(0, nvalues)
+        if np is not None:
+            lengths = np.concatenate(length_parts) if length_parts else []
+            offsets = np.zeros(len(lengths) + 1, dtype=dtype)
+            np.cumsum(lengths, out=offsets[1:])
+        else:
+            lengths = (length for part in length_parts for length in part)
+            offsets = array(code, accumulate(lengths, initial=0))
+        return cls(values, offsets)
+
+    @classmethod
+    def from_lines(cls, lines: Lines, block_lines: int = 1_000_000) -> "ReportStore":
+        return cls.from_blocks(
+            "\n".join(lines[i:i+block_lines]) for i in range(0, len(lines), block_lines)
+        )
+
+    @classmethod
+    def from_file(cls, infile: str) -> "ReportStore":
+        def blocks():
+            with open(infile, "rb") as fp:
+                rest = b""
+                while chunk := fp.read(cls.BLOCK_BYTES):
+                    chunk = rest + chunk
+                    cut = chunk.rfind(b"\n") + 1
+                    rest = chunk[cut:]
+                    yield chunk[:cut]
+                yield rest
+        return cls.from_blocks(blocks())
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int):
+        if np is not None:
+            return self.values[self.offsets[i]:self.offsets[i+1]]
+        return memoryview(self.values)[self.offsets[i]:self.offsets[i+1]]
+
+    def __iter__(self) -> Iterator:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.values) * self.values.itemsize + len(self.offsets) * self.offsets.itemsize
+
+    def count_safe(self, dampened: bool = False) -> int:
+        """Count the reports that are safe (with the dampener, if dampened)."""
+        if np is None:
+            is_safe = dampened_report_is_safe if dampened else report_is_safe
+            return sum(1 for levels in self if is_safe(levels))
+
+        count = 0
+        for start in range(0, len(self), self.BATCH_REPORTS):
+            stop = min(start + self.BATCH_REPORTS, len(self))
+            first, last = self.offsets[start], self.offsets[stop]
+            # Widen the levels, so the changes between them can't overflow.
+            matrix, lengths = pad_reports(
+                self.values[first:last].astype(np.int64),
+                self.offsets[start:stop+1] - first
+            )
+            count += int(batch_reports_are_safe(matrix, lengths, dampened).sum())
+        return count
+
+
 def solve2(lines: Lines) -> int:
     """Solve the problem."""
-    count = 0
-    for line in lines:
-        levels = list(map(int, line.strip().split()))
-        if dampened_report_is_safe(levels):
-            count += 1
-    return count
+    return ReportStore.from_lines(lines).count_safe(dampened=True)
 
 def solve(lines: Lines) -> int:
     """Solve the problem."""
-    count = 0
-    for line in lines:
-        levels = list(map(int, line.strip().split()))
-        if report_is_safe(levels):
-            count += 1
-    return count
+    return ReportStore.from_lines(lines).count_safe()
 
 
 # PART 1
@@ -207,7 +354,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 379
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -227,7 +374,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 430
+    assert result == ANSWER2
     print("= " * 32)
 
 
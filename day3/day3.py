@@ -2,15 +2,23 @@
 #
 #  Advent of Code 2024 - Day 3
 #
-from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
+from typing import Sequence, Union, Optional, Any, Callable, Dict, Iterable, Iterator, List, Tuple
 from pathlib import Path
 from collections import defaultdict
 from dataclasses import dataclass
 from pprint import pprint
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 import math
+import mmap
+import os
 import re
 
 INPUTFILE = "input.txt"
+ANSWER1 = 167090022
+ANSWER2 = 89823704
 
 SAMPLE_CASES = [
     (
@@ -67,59 +75,489 @@ def parse_sections(lines: Lines) -> Sections:
 
 # Solution
 
-MUL_RE = re.compile(r"mul\((\d+),(\d+)\)")
-INSTRUCTION_RE = re.compile(r"mul\(\d+,\d+\)|do\(\)|don't\(\)")
+# The operands of a mul instruction are 1-3 digit numbers.
+MUL_RE = re.compile(r"mul\((\d{1,3}),(\d{1,3})\)")
+INSTRUCTION_RE = re.compile(r"mul\((\d{1,3}),(\d{1,3})\)|do\(\)|don't\(\)")
 
-INST_MUL = "mul("
-INST_DO = "do("
-INST_DONT = "don't("
+# Bytes patterns, for scanning raw input without decoding it.
+MUL_BYTES_RE = re.compile(MUL_RE.pattern.encode())
+SCAN_RE = re.compile(INSTRUCTION_RE.pattern.encode())
 
-def find_enabled_muls(text: str) -> list[Tuple[int, int]]:
-    result = []
+INST_DO = "do()"
+MAX_INSTRUCTION_LEN = len("mul(999,999)")
+CHUNK_SIZE = 2**20
+
+# Inputs smaller than this are scanned in this process.
+PARALLEL_MIN_BYTES = 8 * 2**20
+
+# Text to scan: a str, or any bytes-like buffer (bytes, memoryview, mmap).
+Buffer = Union[str, bytes, memoryview, mmap.mmap]
+
+def is_do(m: re.Match) -> bool:
+    """Whether a do() or don't() match is a do()."""
+    return m.end() - m.start() == len(INST_DO)
+
+def sum_enabled_muls(text: Buffer) -> int:
+    result = 0
     enabled = True
-    for m in INSTRUCTION_RE.finditer(text):
-        if m:
-            inst = m.group(0)
-            if inst.startswith(INST_MUL):
-                if enabled:
-                    m2 = MUL_RE.match(inst)
-                    a, b = m2.groups()
-                    # print(f"--> mul({a},{b})")
-                    result.append((int(a), int(b)))
-            elif inst.startswith(INST_DO):
-                # print("--> ENABLED")
-                enabled = True
-            elif inst.startswith(INST_DONT):
-                # print("--> DISABLED")
-                enabled = False
-            else:
-                print(f"!!!! UNEXPECTED MATCH ON {inst}")
+    pattern = INSTRUCTION_RE if isinstance(text, str) else SCAN_RE
+    for m in pattern.finditer(text):
+        a, b = m.group(1, 2)
+        if a is not None:
+            if enabled:
+                result += int(a) * int(b)
+        else:
+            enabled = is_do(m)
     return result
 
-def find_muls(text: str) -> list[Tuple[int, int]]:
-    result = []
-    for m in MUL_RE.finditer(text):
-        if m:
-            a, b = m.groups()
-            # print(f"--> mul({a},{b})")
-            result.append((int(a), int(b)))
+def sum_muls(text: Buffer) -> int:
+    result = 0
+    pattern = MUL_RE if isinstance(text, str) else MUL_BYTES_RE
+    for m in pattern.finditer(text):
+        result += int(m.group(1)) * int(m.group(2))
     return result
 
+@contextmanager
+def mapped(infile: str) -> Iterator[Buffer]:
+    """Memory-map a file, for reading."""
+    with open(infile, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped.
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+class StreamScanner:
+    """A StreamScanner sums the mul instructions in a stream of bytes that
+    is fed to it a chunk at a time, keeping track of the do()/don't() state
+    as it goes.
+
+    An instruction may be split across two chunks, so the end of each chunk
+    that could still be the start of one (at most MAX_INSTRUCTION_LEN - 1
+    bytes, after the last complete instruction) is carried over to the next.
+    Memory use doesn't depend on the size of the stream.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.enabled_total = 0
+        self.enabled = True
+        self.carry = b""
+
+    def _scan(self, data: bytes) -> int:
+        """Add up the instructions in data, returning the end offset of the
+        last one."""
+        end = 0
+        for m in SCAN_RE.finditer(data):
+            a, b = m.group(1, 2)
+            if a is not None:
+                product = int(a) * int(b)
+                self.total += product
+                if self.enabled:
+                    self.enabled_total += product
+            else:
+                self.enabled = is_do(m)
+            end = m.end()
+        return end
+
+    def feed(self, chunk: bytes) -> None:
+        data = self.carry + chunk
+        end = self._scan(data)
+        self.carry = data[max(end, len(data) - MAX_INSTRUCTION_LEN + 1):]
+
+    def close(self) -> None:
+        self._scan(self.carry)
+        self.carry = b""
+
+def scan_file(infile: str, chunk_size: int = CHUNK_SIZE) -> StreamScanner:
+    """Scan an input file of any size, returning the scanner, whose total and
+    enabled_total are the answers to parts 1 and 2."""
+    scanner = StreamScanner()
+    with open(infile, "rb") as f:
+        while chunk := f.read(chunk_size):
+            scanner.feed(chunk)
+    scanner.close()
+    return scanner
+
+@dataclass
+class ChunkSummary:
+    """The part 2 sum over a chunk of the input depends on whether muls are
+    enabled at the start of the chunk, but only up to its first do() or
+    don't().  So a chunk is summarized by the sum of its muls before that
+    (lead), the sum of its enabled muls after it (rest), and the state it
+    leaves muls in (exit, or None if it has no do() or don't()).
+
+    Adding the summaries of neighbouring chunks gives the summary of the
+    two together, and the addition is associative, so chunks can be scanned
+    independently and their summaries folded in order.
+    """
+    total: int = 0
+    lead: int = 0
+    rest: int = 0
+    exit: Optional[bool] = None
+
+    def __add__(self, other: "ChunkSummary") -> "ChunkSummary":
+        if self.exit is None:
+            return ChunkSummary(
+                self.total + other.total, self.lead + other.lead,
+                self.rest + other.rest, other.exit
+            )
+        return ChunkSummary(
+            self.total + other.total, self.lead,
+            self.rest + other.enabled_total(self.exit),
+            self.exit if other.exit is None else other.exit
+        )
+
+    def enabled_total(self, enabled: bool = True) -> int:
+        """The sum of the enabled muls, given the state at the start."""
+        return self.lead + self.rest if enabled else self.rest
+
+def summarize(data: Buffer, start: int = 0, end: Optional[int] = None) -> ChunkSummary:
+    """Summarize the instructions that start in data[start:end].  An
+    instruction may run up to MAX_INSTRUCTION_LEN - 1 bytes past the end."""
+    end = len(data) if end is None else end
+    summary = ChunkSummary()
+    endpos = min(len(data), end + MAX_INSTRUCTION_LEN - 1)
+    for m in SCAN_RE.finditer(data, start, endpos):
+        if m.start() >= end:
+            break
+        a, b = m.group(1, 2)
+        if a is not None:
+            product = int(a) * int(b)
+            summary.total += product
+            if summary.exit is None:
+                summary.lead += product
+            elif summary.exit:
+                summary.rest += product
+        else:
+            summary.exit = is_do(m)
+    return summary
+
+def summarize_range(infile: str, start: int, end: int) -> ChunkSummary:
+    """Summarize the instructions that start in bytes [start, end) of a file."""
+    with mapped(infile) as data:
+        return summarize(data, start, end)
+
+def solve_file(infile: str) -> Tuple[int, int]:
+    """Solve both parts for an input file in one pass, scanning it in place
+    through a memory map, returning the answers to parts 1 and 2."""
+    with mapped(infile) as data:
+        summary = summarize(data)
+    return summary.total, summary.enabled_total()
+
+def scan_file_parallel(infile: str, workers: Optional[int] = None) -> Tuple[int, int]:
+    """Scan an input file in chunks, in a pool of worker processes, returning
+    the answers to parts 1 and 2."""
+    size = Path(infile).stat().st_size
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or size < PARALLEL_MIN_BYTES:
+        summary = summarize_range(infile, 0, size)
+    else:
+        bounds = [size * i // workers for i in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = pool.map(
+                summarize_range, [infile] * workers, bounds[:-1], bounds[1:]
+            )
+            summary = sum(summaries, ChunkSummary())
+    return summary.total, summary.enabled_total()
+
+
+class InstructionIndex:
+    """An InstructionIndex records where the instructions are in an input,
+    so the sums of the muls over any range of it can be found without
+    scanning it again.
+
+    It holds the offsets of the muls, with prefix sums of all of their
+    products and of the products of the enabled ones, and the offsets of the
+    do() and don't() instructions, with the state that each one sets.  A
+    query is a couple of binary searches, so it takes O(log n) time.
+
+    An instruction belongs to a range if it starts in it.
+    """
+
+    def __init__(self):
+        self.offsets = array("q")
+        self.totals = array("q", [0])
+        self.enabled_totals = array("q", [0])
+        self.toggle_offsets = array("q")
+        self.toggle_states = array("b")
+
+    @classmethod
+    def from_buffer(cls, data: Buffer) -> "InstructionIndex":
+        index = cls()
+        total = enabled_total = 0
+        enabled = True
+        pattern = INSTRUCTION_RE if isinstance(data, str) else SCAN_RE
+        for m in pattern.finditer(data):
+            a, b = m.group(1, 2)
+            if a is not None:
+                product = int(a) * int(b)
+                total += product
+                if enabled:
+                    enabled_total += product
+                index.offsets.append(m.start())
+                index.totals.append(total)
+                index.enabled_totals.append(enabled_total)
+            else:
+                enabled = is_do(m)
+                index.toggle_offsets.append(m.start())
+                index.toggle_states.append(enabled)
+        return index
+
+    @classmethod
+    def from_file(cls, infile: str) -> "InstructionIndex":
+        with mapped(infile) as data:
+            return cls.from_buffer(data)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _span(self, start: int, end: Optional[int]) -> Tuple[int, int]:
+        """The indices of the first mul at or after start, and of the first
+        mul at or after end."""
+        i = bisect_left(self.offsets, start)
+        j = len(self.offsets) if end is None else bisect_left(self.offsets, end)
+        return i, max(i, j)
+
+    def state_at(self, offset: int) -> bool:
+        """Whether muls are enabled at the offset, in a scan of the whole
+        input."""
+        k = bisect_left(self.toggle_offsets, offset)
+        return bool(self.toggle_states[k - 1]) if k else True
+
+    def total(self, start: int = 0, end: Optional[int] = None) -> int:
+        """The sum of all of the muls in [start, end)."""
+        i, j = self._span(start, end)
+        return self.totals[j] - self.totals[i]
+
+    def enabled_total(
+        self, start: int = 0, end: Optional[int] = None, enabled: Optional[bool] = None
+    ) -> int:
+        """The sum of the enabled muls in [start, end).  By default, muls are
+        enabled or not as they are in a scan of the whole input; if enabled is
+        given, the range is scanned as if it started in that state."""
+        i, j = self._span(start, end)
+        if enabled is None:
+            enabled = self.state_at(start)
+        # Up to the first do() or don't() in the range, the muls are all
+        # enabled or all disabled.  After it, the state is the same as in a
+        # scan of the whole input.
+        k = bisect_left(self.toggle_offsets, start)
+        if k < len(self.toggle_offsets):
+            m = min(j, max(i, bisect_left(self.offsets, self.toggle_offsets[k])))
+        else:
+            m = j
+        head = self.totals[m] - self.totals[i] if enabled else 0
+        return head + self.enabled_totals[j] - self.enabled_totals[m]
+
+
+@dataclass
+class Machine:
+    """The state of the instruction VM."""
+    total: int = 0
+    enabled_total: int = 0
+    enabled: bool = True
+
+
+@dataclass
+class Opcode:
+    name: str
+    operands: Tuple[str, ...]
+    handler: Callable[..., None]
+
+    def pattern(self) -> str:
+        args = ",".join(f"({operand})" for operand in self.operands)
+        return f"({re.escape(self.name)}\\({args}\\))"
+
+
+class InstructionSet:
+    """An InstructionSet is a set of opcodes, each with a name, a regex for
+    each of its integer operands (without any groups of its own), and a
+    handler that's called with the Machine and the operand values:
+
+        @ops.opcode("add", "[0-9]+", "[0-9]+")
+        def op_add(vm, a, b): ...
+
+    The opcodes are compiled into a single pattern, with a group around each
+    instruction, so one scan finds them all, and each match is dispatched
+    through a table indexed by the number of the instruction's group, to
+    its handler, with the values of only its own operand groups.
+    """
+
+    def __init__(self, opcodes: Iterable[Opcode] = ()):
+        self.opcodes = list(opcodes)
+        self._compiled: Dict[type, Tuple[re.Pattern, list]] = {}
+
+    def opcode(self, name: str, *operands: str) -> Callable:
+        """Decorator to register a handler for an opcode."""
+        def register(handler: Callable[..., None]) -> Callable[..., None]:
+            self.opcodes.append(Opcode(name, operands, handler))
+            self._compiled.clear()
+            return handler
+        return register
+
+    def copy(self) -> "InstructionSet":
+        return InstructionSet(self.opcodes)
+
+    def compile(self, kind: type = str) -> Tuple[re.Pattern, list]:
+        """Compile the opcodes into a pattern for str (or bytes) input, and a
+        dispatch table of (handler, operand group numbers), indexed by the
+        number of the instruction's group (less 1)."""
+        if kind not in self._compiled:
+            dispatch = [None] * sum(len(op.operands) + 1 for op in self.opcodes)
+            group = 0
+            for op in self.opcodes:
+                operands = tuple(range(group + 2, group + 2 + len(op.operands)))
+                dispatch[group] = (op.handler, operands)
+                group += len(op.operands) + 1
+            # The lookahead for the first letters of the opcodes lets the
+            # scan skip quickly past the other characters, however many
+            # alternatives there are.
+            firsts = "".join(sorted({re.escape(op.name[0]) for op in self.opcodes}))
+            source = f"(?=[{firsts}])(?:" + "|".join(op.pattern() for op in self.opcodes) + ")"
+            pattern = re.compile(source if kind is str else source.encode())
+            self._compiled[kind] = (pattern, dispatch)
+        return self._compiled[kind]
+
+    def run(self, text: Buffer, vm: Optional[Machine] = None) -> Machine:
+        """Run the instructions in the text, returning the machine."""
+        pattern, dispatch = self.compile(str if isinstance(text, str) else bytes)
+        vm = vm or Machine()
+        for m in pattern.finditer(text):
+            handler, operands = dispatch[m.lastindex - 1]
+            # Only the instruction's own operand groups are fetched.
+            if len(operands) > 1:
+                handler(vm, *map(int, m.group(*operands)))
+            elif operands:
+                handler(vm, int(m.group(operands[0])))
+            else:
+                handler(vm)
+        return vm
+
+
+DAY3_OPS = InstructionSet()
+
+@DAY3_OPS.opcode("mul", r"\d{1,3}", r"\d{1,3}")
+def op_mul(vm: Machine, a: int, b: int) -> None:
+    vm.total += a * b
+    if vm.enabled:
+        vm.enabled_total += a * b
+
+@DAY3_OPS.opcode("do")
+def op_do(vm: Machine) -> None:
+    vm.enabled = True
+
+@DAY3_OPS.opcode("don't")
+def op_dont(vm: Machine) -> None:
+    vm.enabled = False
+
+def solve2_vm(lines: Lines) -> int:
+    """Solve the problem with the instruction VM."""
+    return DAY3_OPS.run(" ".join([line.strip() for line in lines])).enabled_total
+
+def solve_vm(lines: Lines) -> int:
+    """Solve the problem with the instruction VM."""
+    return DAY3_OPS.run(" ".join([line.strip() for line in lines])).total
+
+
+# States of the DFA scanner.  The states up to FIRST_ACTION have nothing to
+# do on entry; the others accumulate a digit or complete an instruction.
+(
+    S_START, S_M, S_MU, S_MUL, S_MUL_OPEN, S_COMMA,
+    S_D, S_DO, S_DO_OPEN, S_DON, S_DON_Q, S_DON_QT, S_DONT_OPEN,
+    S_A1, S_A2, S_A3, S_B1, S_B2, S_B3,
+    S_EMIT_MUL, S_EMIT_DO, S_EMIT_DONT,
+) = range(22)
+FIRST_ACTION = S_A1
+
+DIGITS = b"0123456789"
+
+def build_dfa() -> list[bytes]:
+    """Build the DFA's transition table: table[state][byte] is the next state.
+
+    None of the instructions can start part way through another one, so when
+    a byte doesn't continue an instruction, the scanner restarts with that
+    byte, from the start state.
+    """
+    edges = {
+        S_START: {b"m": S_M, b"d": S_D},
+        S_M: {b"u": S_MU},
+        S_MU: {b"l": S_MUL},
+        S_MUL: {b"(": S_MUL_OPEN},
+        S_MUL_OPEN: {DIGITS: S_A1},
+        S_A1: {DIGITS: S_A2, b",": S_COMMA},
+        S_A2: {DIGITS: S_A3, b",": S_COMMA},
+        S_A3: {b",": S_COMMA},
+        S_COMMA: {DIGITS: S_B1},
+        S_B1: {DIGITS: S_B2, b")": S_EMIT_MUL},
+        S_B2: {DIGITS: S_B3, b")": S_EMIT_MUL},
+        S_B3: {b")": S_EMIT_MUL},
+        S_D: {b"o": S_DO},
+        S_DO: {b"(": S_DO_OPEN, b"n": S_DON},
+        S_DO_OPEN: {b")": S_EMIT_DO},
+        S_DON: {b"'": S_DON_Q},
+        S_DON_Q: {b"t": S_DON_QT},
+        S_DON_QT: {b"(": S_DONT_OPEN},
+        S_DONT_OPEN: {b")": S_EMIT_DONT},
+    }
+    restart = bytearray(256)
+    for chars, target in edges[S_START].items():
+        for c in chars:
+            restart[c] = target
+    table = []
+    for state in range(S_EMIT_DONT + 1):
+        row = bytearray(restart)
+        for chars, target in edges.get(state, {}).items():
+            for c in chars:
+                row[c] = target
+        table.append(bytes(row))
+    return table
+
+DFA = build_dfa()
+
+def dfa_scan(data: bytes) -> Tuple[int, int]:
+    """Scan the data with the DFA, in a single pass, returning the sum of all
+    of the muls and the sum of the enabled muls."""
+    table = DFA
+    total = enabled_total = 0
+    enabled = True
+    a = b = 0
+    state = S_START
+    for c in data:
+        state = table[state][c]
+        if state < FIRST_ACTION:
+            continue
+        if state <= S_A3:
+            a = c - 48 if state == S_A1 else a * 10 + c - 48
+        elif state <= S_B3:
+            b = c - 48 if state == S_B1 else b * 10 + c - 48
+        elif state == S_EMIT_MUL:
+            total += a * b
+            if enabled:
+                enabled_total += a * b
+        else:
+            enabled = state == S_EMIT_DO
+    return total, enabled_total
+
+def solve2_dfa(lines: Lines) -> int:
+    """Solve the problem with the DFA scanner."""
+    return dfa_scan(" ".join([line.strip() for line in lines]).encode())[1]
+
+def solve_dfa(lines: Lines) -> int:
+    """Solve the problem with the DFA scanner."""
+    return dfa_scan(" ".join([line.strip() for line in lines]).encode())[0]
+
 def solve2(lines: Lines) -> int:
     """Solve the problem."""
-    result = 0
     text = " ".join([line.strip() for line in lines])
-    for a, b in find_enabled_muls(text):
-        result += a * b
-    return result
+    return sum_enabled_muls(text)
 
 def solve(lines: Lines) -> int:
     """Solve the problem."""
-    result = 0
     text = " ".join([line.strip() for line in lines])
-    for a, b in find_muls(text):
-        result += a * b
-    return result
+    return sum_muls(text)
 
 
 # PART 1
@@ -138,7 +576,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 167090022
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -158,7 +596,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 89823704
+    assert result == ANSWER2
     print("= " * 32)
 
 
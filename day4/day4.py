@@ -4,13 +4,23 @@
 #
 from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
+from functools import cached_property
 from pprint import pprint
+from concurrent.futures import ProcessPoolExecutor
 import math
+import os
 import re
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 INPUTFILE = "input.txt"
+ANSWER1 = 2560
+ANSWER2 = 1910
 
 SAMPLE_CASES = [
     (
@@ -88,6 +98,9 @@ def parse_sections(lines: Lines) -> Sections:
 EMPTY = " "
 XMAS = "XMAS"
 
+# Grids with fewer cells than this are searched in this process.
+PARALLEL_MIN_CELLS = 4 * 2**20
+
 DIRS = {
     "N": (-1, 0),
     "NE": (-1, 1),
@@ -124,6 +137,62 @@ class Pos():
         return Pos(self.row + dr, self.col + dc)
 
 
+def count_overlapping(text: str, word: str) -> int:
+    """Count the occurrences of the word in the text, including ones that
+    overlap."""
+    count = 0
+    i = text.find(word)
+    while i >= 0:
+        count += 1
+        i = text.find(word, i + 1)
+    return count
+
+
+class WordMatcher:
+    """An Aho-Corasick automaton, for counting the occurrences of many words
+    (overlapping or not) in a single pass over a text."""
+
+    def __init__(self, words: Sequence[str]):
+        if not all(words):
+            raise ValueError("Can't match an empty word")
+        self.words = list(words)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail = [0]
+        self.out: List[List[int]] = [[]]
+        for i, word in enumerate(self.words):
+            state = 0
+            for ch in word:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].append(i)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                fail = self.fail[state]
+                while fail and ch not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(ch, 0)
+                self.out[child] += self.out[self.fail[child]]
+                queue.append(child)
+
+    def count(self, text: str, counts: List[int]) -> None:
+        """Add the number of occurrences of each word in the text to counts."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for i in out[state]:
+                counts[i] += 1
+
+
 @dataclass
 class Grid:
     grid: dict[Pos, str]
@@ -131,12 +200,19 @@ class Grid:
     def __post_init__(self):
         self.nrow = max([pos.row for pos in self.grid.keys()]) + 1
         self.ncol = max([pos.col for pos in self.grid.keys()]) + 1
+        # The positions of each letter, in row order.
+        self.index: dict[str, List[Pos]] = defaultdict(list)
+        for pos in sorted(self.grid):
+            self.index[self.grid[pos]].append(pos)
 
     def positions(self):
         for row in range(self.nrow):
             for col in range(self.ncol):
                 yield Pos(row, col)
 
+    def positions_of(self, ch: str) -> List[Pos]:
+        return self.index.get(ch, [])
+
     def matches_word(self, start: Pos, dir: str, target=XMAS) -> bool:
         result = 0
         pos = start
@@ -146,50 +222,123 @@ class Grid:
             pos = pos.neighbor(dir)
         return True
 
-    def matches_cross_mas(self, start: Pos) -> bool:
-        if self.grid[start] != "A":
+    def matches_cross(self, start: Pos, target="MAS") -> bool:
+        """Whether the odd-length target word is on both diagonals through
+        start, centred on it, forwards or backwards."""
+        half = len(target) // 2
+        if self.grid.get(start) != target[half]:
             return False
+        for dr, dc in (DIRS["SE"], DIRS["NE"]):
+            word = "".join(
+                self.grid.get(Pos(start.row + k * dr, start.col + k * dc), EMPTY)
+                for k in range(-half, half + 1)
+            )
+            if word != target and word[::-1] != target:
+                return False
+        return True
 
-        r0, c0 = start.row, start.col
-
-        dir1 = "NE"
-        dr1, dc1 = DIRS[dir1]
-        pos1, pos2 = Pos(r0+dr1,c0+dc1), Pos(r0-dr1,c0-dc1)
-        if ((self.grid[pos1] == "M" and self.grid[pos2] == "S") or
-            (self.grid[pos2] == "M" and self.grid[pos1] == "S")):
-
-            dir2 = "SE"
-            dr2, dc2 = DIRS[dir2]
-            pos3, pos4 = Pos(r0+dr2,c0+dc2), Pos(r0-dr2,c0-dc2)
-            if ((self.grid[pos3] == "M" and self.grid[pos4] == "S") or
-                (self.grid[pos4] == "M" and self.grid[pos3] == "S")):
-
-                # print(f"-> @({r0}, {c0}) \t '{self.grid[start]}'")
-                # print(f"   @({pos1.row}, {pos1.col}) \t'{self.grid[pos1]}'")
-                # print(f"   @({pos2.row}, {pos2.col}) \t'{self.grid[pos2]}'")
-                # print(f"   @({pos3.row}, {pos3.col}) \t'{self.grid[pos3]}'")
-                # print(f"   @({pos4.row}, {pos4.col}) \t'{self.grid[pos4]}'")
-                # print()
-                return True
-
-        return False
-
+    @cached_property
+    def projections(self) -> List[str]:
+        """The rows, columns, diagonals and anti-diagonals of the grid, as
+        strings.  A word in any of the 8 directions is in one of these,
+        forwards or backwards."""
+        def line(cells) -> str:
+            return "".join(self.grid.get(Pos(row, col), EMPTY) for row, col in cells)
+
+        nrow, ncol = self.nrow, self.ncol
+        result = []
+        for row in range(nrow):
+            result.append(line((row, col) for col in range(ncol)))
+        for col in range(ncol):
+            result.append(line((row, col) for row in range(nrow)))
+        for diff in range(-(ncol - 1), nrow):
+            rows = range(max(0, diff), min(nrow, ncol + diff))
+            result.append(line((row, row - diff) for row in rows))
+        for total in range(nrow + ncol - 1):
+            rows = range(max(0, total - ncol + 1), min(nrow, total + 1))
+            result.append(line((row, total - row) for row in rows))
+        return result
 
     def count_words(self, target=XMAS) -> int:
+        """Count the occurrences of the target word in all 8 directions."""
+        backward = target[::-1]
+        return sum(
+            count_overlapping(line, target) + count_overlapping(line, backward)
+            for line in self.projections
+        )
+
+    def count_many_words(self, targets: Sequence[str]) -> Dict[str, int]:
+        """Count the occurrences of each of the target words in all 8
+        directions, in a single pass over the grid."""
+        matcher = WordMatcher(list(targets) + [word[::-1] for word in targets])
+        counts = [0] * len(matcher.words)
+        for line in self.projections:
+            matcher.count(line, counts)
+        n = len(targets)
+        return {word: counts[i] + counts[i + n] for i, word in enumerate(targets)}
+
+    def count_words_anchored(self, target=XMAS) -> int:
+        """Count the occurrences of the target word in all 8 directions, by
+        trying each cell that holds the word's rarest letter (the anchor) at
+        the anchor's place in the word.  For a one-off query on a big grid,
+        that's quicker than building the projections."""
+        anchor = min(range(len(target)), key=lambda i: len(self.positions_of(target[i])))
         result = 0
-        for pos in self.positions():
-            ch = self.grid[pos]
-            if ch != target[0]:
-                continue
-            for dir in DIRS:
-                if self.matches_word(pos, dir, target):
+        for pos in self.positions_of(target[anchor]):
+            for dir, (dr, dc) in DIRS.items():
+                start = Pos(pos.row - anchor * dr, pos.col - anchor * dc)
+                if self.matches_word(start, dir, target):
                     result += 1
         return result
 
+    @cached_property
+    def letters(self):
+        """The grid as a numpy array of character codes."""
+        return np.array(
+            [[ord(self.grid.get(Pos(row, col), EMPTY)) for col in range(self.ncol)]
+             for row in range(self.nrow)],
+            dtype=np.uint32
+        )
+
+    def count_cross_words_vectorized(self, target: str) -> int:
+        """Count the X-crosses of the target word, with a fixed number of
+        array operations for each letter of the target.
+
+        For each letter k of the target, the cells k steps along a diagonal
+        from the top-left corner of every possible cross are a shifted slice
+        of the grid, so comparing the slice with the letter checks that
+        letter for every cross at once.
+        """
+        n = len(target)
+        span = n - 1
+        nrow, ncol = self.nrow - span, self.ncol - span
+        if nrow <= 0 or ncol <= 0:
+            return 0
+        grid = self.letters
+        codes = [ord(ch) for ch in target]
+
+        def diagonal(codes, anti: bool):
+            found = np.ones((nrow, ncol), dtype=bool)
+            for k, code in enumerate(codes):
+                col = span - k if anti else k
+                found &= grid[k:k + nrow, col:col + ncol] == code
+            return found
+
+        main = diagonal(codes, False) | diagonal(codes[::-1], False)
+        anti = diagonal(codes, True) | diagonal(codes[::-1], True)
+        return int(np.count_nonzero(main & anti))
+
     def count_cross_words(self, target: str) -> int:
+        """Count the X-crosses of an odd-length target word: the places where
+        it's on both diagonals through its middle letter, forwards or
+        backwards."""
+        if len(target) % 2 != 1:
+            raise ValueError(f"Target '{target}' must have an odd length")
+        if np is not None:
+            return self.count_cross_words_vectorized(target)
         result = 0
-        for pos in self.positions():
-            if self.matches_cross_mas(pos):
+        for pos in self.positions_of(target[len(target) // 2]):
+            if self.matches_cross(pos, target):
                 result += 1
         return result
 
@@ -203,6 +352,72 @@ def parse_input(lines):
     return Grid(grid)
 
 
+def row_codes(row: str):
+    return np.frombuffer(row.encode("utf-32-le"), dtype=np.uint32)
+
+def count_band(rows: Lines, first: int, last: int, target=XMAS) -> int:
+    """Count the occurrences of the target word, in all 8 directions, that
+    start in rows[first:last].  The rows around the band, as far as the
+    target can reach, must be included in rows too."""
+    span = len(target) - 1
+    ncol = max((len(row) for row in rows), default=0)
+    result = 0
+    if np is None:
+        for r in range(first, last):
+            for c, ch in enumerate(rows[r]):
+                if ch != target[0]:
+                    continue
+                for dr, dc in DIRS.values():
+                    for k in range(1, len(target)):
+                        r2, c2 = r + k * dr, c + k * dc
+                        if not (0 <= r2 < len(rows) and 0 <= c2 < len(rows[r2])):
+                            break
+                        if rows[r2][c2] != target[k]:
+                            break
+                    else:
+                        result += 1
+        return result
+
+    # Pad the band with zeros, so the target can't match off the edges.
+    padded = np.zeros((len(rows) + 2 * span, ncol + 2 * span), dtype=np.uint32)
+    for r, row in enumerate(rows):
+        padded[span + r, span:span + len(row)] = row_codes(row)
+    nrow = last - first
+    for dr, dc in DIRS.values():
+        found = np.ones((nrow, ncol), dtype=bool)
+        for k, ch in enumerate(target):
+            r, c = span + first + k * dr, span + k * dc
+            found &= padded[r:r + nrow, c:c + ncol] == ord(ch)
+        result += int(np.count_nonzero(found))
+    return result
+
+def count_words_tiled(rows: Lines, target=XMAS, workers: Optional[int] = None) -> int:
+    """Count the occurrences of the target word in all 8 directions, in a
+    grid given as rows of letters, splitting the grid into bands of rows that
+    are searched in parallel.
+
+    Each band is searched along with a halo of len(target) - 1 rows above
+    and below it, but only the words that start in the band itself are
+    counted, so each word is counted once.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or sum(map(len, rows)) < PARALLEL_MIN_CELLS:
+        return count_band(rows, 0, len(rows), target)
+    span = len(target) - 1
+    bounds = [len(rows) * i // workers for i in range(workers + 1)]
+    bands, firsts, lasts = [], [], []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        lo, hi = max(0, start - span), min(len(rows), end + span)
+        bands.append(rows[lo:hi])
+        firsts.append(start - lo)
+        lasts.append(end - lo)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(count_band, bands, firsts, lasts, [target] * workers))
+
+def solve_tiled(lines: Lines) -> int:
+    """Solve the problem, searching bands of the grid in parallel."""
+    return count_words_tiled([line.strip() for line in lines])
+
 def solve2(lines: Lines) -> int:
     """Solve the problem."""
     target = "MAS"
@@ -233,7 +448,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 2560
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -253,7 +468,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 1910
+    assert result == ANSWER2
     print("= " * 32)
 
 
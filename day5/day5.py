@@ -2,15 +2,19 @@
 #
 #  Advent of Code 2024 - Day 5
 #
-from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
+from typing import Sequence, Union, Optional, Any, Dict, Iterator, List, Tuple
 from pathlib import Path
 from collections import defaultdict
 from dataclasses import dataclass
 from pprint import pprint, pformat
+import heapq
 import math
 import re
 
 INPUTFILE = "input.txt"
+ANSWER1 = 4957
+ANSWER2 = 6938
+BLANK_LINES = True
 
 SAMPLE_CASES = [
     (
@@ -142,38 +146,95 @@ def parse_input(lines) -> Tuple[Rules, list[Update]]:
 
     return rules, updates
 
-def update_is_correct(rules: Rules, update: Update) -> bool:
-    for i in range(1, len(update)):
-        after = update[i]
-        if any([before in rules[after] for before in update[:i]]):
+class PageOrder:
+    """The rules compiled into a bitset for each page number: bit q of
+    successors[p] is set if there's a rule p|q, so page q must come after
+    page p."""
+
+    def __init__(self, rules: Rules):
+        pages = set(rules)
+        for afters in rules.values():
+            pages |= afters
+        self.successors = [0] * (max(pages, default=-1) + 1)
+        for before, afters in rules.items():
+            for after in afters:
+                self.successors[before] |= 1 << after
+
+    def must_follow(self, page: int) -> int:
+        """The bitset of the pages that must come after the page."""
+        if page < len(self.successors):
+            return self.successors[page]
+        return 0
+
+    def precedes(self, before: int, after: int) -> bool:
+        """Whether there's a rule that before must come before after."""
+        return bool(self.must_follow(before) >> after & 1)
+
+
+def update_is_correct(order: PageOrder, update: Update) -> bool:
+    """Check the update in a single pass, keeping a bitset of the pages seen
+    so far: none of them may be a page that must follow the current one."""
+    seen = 0
+    for page in update:
+        if order.must_follow(page) & seen:
             return False
+        seen |= 1 << page
     return True
 
-def correct_update(rules: Rules, update: Update) -> Tuple[Update, bool]:
-    # print(f"----\ninitial: {update}")
-    for i in range(1, len(update)):
-        after = update[i]
-        for j in range(i):
-            before = update[j]
-            if before in rules[after]:
-                # print(f"!! page[{j}] {before} must follow page[{i}] {after}")
-                new_update = update[:j] + update[i:i+1] + update[j:i] + update[i+1:]
-                # print(f"reorder -> {new_update}")
-                return new_update, False
-    return update, True
+class OrderingError(ValueError):
+    """OrderingError is raised when the rules between the pages of an update
+    form a cycle, so there's no order that satisfies them all."""
+
+
+def bits(mask: int) -> Iterator[int]:
+    """Generate the numbers of the set bits of the mask."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def reorder_update(order: PageOrder, update: Update) -> Update:
+    """Sort the pages of an update into an order that satisfies the rules,
+    in a single pass, with Kahn's algorithm over the rules between its
+    pages.  Pages that aren't constrained relative to each other keep their
+    order in the update.  Each page may only appear once."""
+    index = {page: i for i, page in enumerate(update)}
+    if len(index) != len(update):
+        raise ValueError(f"Update {update} has repeated pages")
+    present = sum(1 << page for page in index)
+    successors = {page: order.must_follow(page) & present for page in index}
+    indegree = dict.fromkeys(index, 0)
+    for page in index:
+        for after in bits(successors[page]):
+            indegree[after] += 1
+
+    ready = [(i, page) for page, i in index.items() if not indegree[page]]
+    heapq.heapify(ready)
+    result = []
+    while ready:
+        _, page = heapq.heappop(ready)
+        result.append(page)
+        for after in bits(successors[page]):
+            indegree[after] -= 1
+            if not indegree[after]:
+                heapq.heappush(ready, (index[after], after))
+
+    if len(result) < len(index):
+        cycle = sorted(page for page in index if indegree[page])
+        raise OrderingError(f"The rules for pages {cycle} aren't a consistent ordering")
+    return result
 
 def solve2(lines: Lines) -> int:
     """Solve the problem."""
     result = 0
     rules, updates = parse_input(lines)
+    order = PageOrder(rules)
     # print("Rules:\n", pformat(rules), "\n")
     for update in updates:
         # print(f">> {update}")
-        ok = update_is_correct(rules, update)
-        if ok:
+        if update_is_correct(order, update):
             continue
-        while not ok:
-            update, ok = correct_update(rules, update)
+        update = reorder_update(order, update)
         middle = update[len(update)//2]
         # print(f"--> CORRECT (add {middle})")
         result += middle
@@ -183,10 +244,11 @@ def solve(lines: Lines) -> int:
     """Solve the problem."""
     result = 0
     rules, updates = parse_input(lines)
+    order = PageOrder(rules)
     # print("Rules:\n", pformat(rules), "\n")
     for update in updates:
         # print(f">> {update}")
-        if update_is_correct(rules, update):
+        if update_is_correct(order, update):
             middle = update[len(update)//2]
             # print(f"--> CORRECT (add {middle})")
             result += middle
@@ -202,7 +264,7 @@ def example1() -> None:
     """Run example for problem with input arguments."""
     print("EXAMPLE 1:")
     for text, expected in SAMPLE_CASES:
-        lines = load_text(text, blank_lines=True)
+        lines = load_text(text, blank_lines=BLANK_LINES)
         result = solve(lines)
         print(f"'{text}' -> {result} (expected {expected})")
         assert result == expected
@@ -212,7 +274,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 4957
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -222,7 +284,7 @@ def example2() -> None:
     """Run example for problem with input arguments."""
     print("EXAMPLE 2:")
     for text, expected in SAMPLE_CASES2:
-        lines = load_text(text, blank_lines=True)
+        lines = load_text(text, blank_lines=BLANK_LINES)
         result = solve2(lines)
         print(f"'{text}' -> {result} (expected {expected})")
         assert result == expected
@@ -232,13 +294,13 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 6938
+    assert result == ANSWER2
     print("= " * 32)
 
 
 if __name__ == "__main__":
     example1()
-    input_lines = load_input(INPUTFILE, blank_lines=True)
+    input_lines = load_input(INPUTFILE, blank_lines=BLANK_LINES)
     part1(input_lines)
     example2()
     part2(input_lines)
@@ -2,15 +2,21 @@
 #
 #  Advent of Code 2024 - Day 6
 #
-from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
+from typing import Sequence, Union, Optional, Any, Callable, Dict, List, Tuple
 from pathlib import Path
 from collections import defaultdict
 from dataclasses import dataclass
 from pprint import pprint
 import math
 import re
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import tracing
 
 INPUTFILE = "input.txt"
+ANSWER1 = 4559
+ANSWER2 = 1604
 
 SAMPLE_CASES = [
     (
@@ -155,12 +161,14 @@ class Guard:
     def patrol(self,
             grid: "Grid",
             visited: set[Tuple[Pos, str]] = None,
-            find_loops: bool = False
+            find_loops: bool = False,
+            progress: Optional[Callable[[int], None]] = None
         ) -> bool:
         """Trace out the path this guard follows on his patrol, and
         determine if it's safe for the historians to work there.
         Returns True if the route is a loop within the grid,
         and False if the patrol leads the guard outside the grid.
+        If given, progress(1) is called for each candidate obstacle tested.
         """
         if find_loops:
             grid.loops = 0
@@ -210,16 +218,21 @@ class Guard:
             # Use a clean grid to see if an obstacle here produces a loop
 
             # print(f"\n---- test obstacle at {ahead} ...")
-            new_guard = Guard(self.pos, self.dxn)
-            new_grid = grid.clone(start=new_guard)
-            new_grid.set(ahead, OBSTACLE)
-            # print(new_grid)
-            is_loop = new_guard.patrol(new_grid, visited=path)
+            with tracing.span("candidate", obstacle=str(ahead)):
+                with tracing.span("setup"):
+                    new_guard = Guard(self.pos, self.dxn)
+                    new_grid = grid.clone(start=new_guard)
+                    new_grid.set(ahead, OBSTACLE)
+                # print(new_grid)
+                with tracing.span("simulate"):
+                    is_loop = new_guard.patrol(new_grid, visited=path)
             if is_loop:
                 # print(f">> Obstacle at {ahead} would create a loop!")
                 grid.loops += 1
             # else:
             #     print(">> No loop here\n")
+            if progress:
+                progress(1)
 
         return False
 
@@ -293,13 +306,15 @@ def parse_input(lines) -> Tuple[Grid, Guard]:
     return grid, guard
 
 
-def solve2(lines: Lines) -> int:
+def solve2(lines: Lines, progress: Optional[Callable[[int], None]] = None) -> int:
     """Solve the problem."""
-    grid, guard = parse_input(lines)
+    with tracing.span("parse"):
+        grid, guard = parse_input(lines)
     # print(grid)
     # print("-" * 64)
     # print(f"Start at {guard}")
-    guard.patrol(grid, find_loops=True)
+    with tracing.span("patrol", find_loops=True):
+        guard.patrol(grid, find_loops=True, progress=progress)
     # print(grid)
     # print("-" * 64)
     return grid.loops
@@ -307,15 +322,18 @@ def solve2(lines: Lines) -> int:
 def solve(lines: Lines) -> int:
     """Solve the problem."""
     result = 0
-    grid, guard = parse_input(lines)
+    with tracing.span("parse"):
+        grid, guard = parse_input(lines)
     # print(grid)
     # print("-" * 64)
 
     # print(f"Start at {guard}")
-    guard.patrol(grid)
+    with tracing.span("patrol"):
+        guard.patrol(grid)
     # print(grid)
     # print("-" * 64)
-    return grid.visited()
+    with tracing.span("count visited"):
+        return grid.visited()
 
 
 # PART 1
@@ -334,7 +352,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 4559
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -354,7 +372,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 1604
+    assert result == ANSWER2
     print("= " * 32)
 
 
@@ -2,15 +2,21 @@
 #
 #  Advent of Code 2024 - Day 7
 #
-from typing import Sequence, Union, Optional, Any, Dict, List, Tuple
+from typing import Sequence, Union, Optional, Any, Callable, Dict, List, Tuple
 from pathlib import Path
 from collections import defaultdict
 from dataclasses import dataclass
 import itertools
 import math
 import re
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import tracing
 
 INPUTFILE = "input.txt"
+ANSWER1 = 42283209483350
+ANSWER2 = 1026766857276279
 
 SAMPLE_CASES = [
     (
@@ -135,22 +141,30 @@ def parse_input(lines: Lines) -> list[Any]:
         result.append((int(value), operands))
     return result
 
-def solve2(lines: Lines) -> int:
+def solve2(lines: Lines, progress: Optional[Callable[[int], None]] = None) -> int:
     """Solve the problem."""
     result = 0
-    cases = parse_input(lines)
+    with tracing.span("parse"):
+        cases = parse_input(lines)
     for value, operands in cases:
-        if resolve2(value, operands):
-            result += value
+        with tracing.span("equation", value=value, operands=len(operands)):
+            if resolve2(value, operands):
+                result += value
+        if progress:
+            progress(1)
     return result
 
-def solve(lines: Lines) -> int:
+def solve(lines: Lines, progress: Optional[Callable[[int], None]] = None) -> int:
     """Solve the problem."""
     result = 0
-    cases = parse_input(lines)
+    with tracing.span("parse"):
+        cases = parse_input(lines)
     for value, operands in cases:
-        if resolve(value, operands):
-            result += value
+        with tracing.span("equation", value=value, operands=len(operands)):
+            if resolve(value, operands):
+                result += value
+        if progress:
+            progress(1)
     return result
 
 
@@ -170,7 +184,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 42283209483350
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -190,7 +204,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 1026766857276279
+    assert result == ANSWER2
     print("= " * 32)
 
 
@@ -11,6 +11,8 @@ import math
 import re
 
 INPUTFILE = "input.txt"
+ANSWER1 = 348
+ANSWER2 = 1221
 
 SAMPLE_CASES = [
     (
@@ -260,7 +262,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 348
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -280,7 +282,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 1221
+    assert result == ANSWER2
     print("= " * 32)
 
 
@@ -9,8 +9,14 @@ from dataclasses import dataclass
 from pprint import pprint
 import math
 import re
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import tracing
 
 INPUTFILE = "input.txt"
+ANSWER1 = 6330095022244
+ANSWER2 = 6359491814941
 
 SAMPLE_CASES = [
     (
@@ -158,45 +164,51 @@ class Diskmap():
 
 def solve2(lines: Lines) -> int:
     """Solve the problem."""
-    diskmap = Diskmap(lines[0].strip())
+    with tracing.span("parse"):
+        diskmap = Diskmap(lines[0].strip())
 
     # print("\nBefore...")
     # print(diskmap)
 
-    for fileno, file_segs in sorted(diskmap.file.items(), reverse=True):
-        assert len(file_segs) == 1
-        file_seg = file_segs[0]
-        seg, left = diskmap.allocate_one(file_seg.size, block_max=file_seg.pos)
-        if left == 0:
-            diskmap.file[fileno] = [seg]
+    with tracing.span("compact"):
+        for fileno, file_segs in sorted(diskmap.file.items(), reverse=True):
+            assert len(file_segs) == 1
+            file_seg = file_segs[0]
+            seg, left = diskmap.allocate_one(file_seg.size, block_max=file_seg.pos)
+            if left == 0:
+                diskmap.file[fileno] = [seg]
 
     # print("\nAfter...")
     # print(diskmap)
 
-    return diskmap.checksum()
+    with tracing.span("checksum"):
+        return diskmap.checksum()
 
 
 def solve(lines: Lines) -> int:
     """Solve the problem."""
-    diskmap = Diskmap(lines[0].strip())
+    with tracing.span("parse"):
+        diskmap = Diskmap(lines[0].strip())
 
     # print("\nBefore...")
     # print(diskmap)
 
-    for fileno, file_segs in sorted(diskmap.file.items(), reverse=True):
-        assert len(file_segs) == 1
-        file_seg = file_segs[0]
-        segs, left = diskmap.allocate(file_seg.size, block_max=file_seg.pos)
-        # print(f"  file {fileno}: {file_seg} -> {', '.join([str(seg) for seg in segs])}")
-        diskmap.file[fileno] = segs
-        if left:
-            diskmap.file[fileno].append(Segment(file_seg.pos, left))
-            break
+    with tracing.span("compact"):
+        for fileno, file_segs in sorted(diskmap.file.items(), reverse=True):
+            assert len(file_segs) == 1
+            file_seg = file_segs[0]
+            segs, left = diskmap.allocate(file_seg.size, block_max=file_seg.pos)
+            # print(f"  file {fileno}: {file_seg} -> {', '.join([str(seg) for seg in segs])}")
+            diskmap.file[fileno] = segs
+            if left:
+                diskmap.file[fileno].append(Segment(file_seg.pos, left))
+                break
 
     # print("\nAfter...")
     # print(diskmap)
 
-    return diskmap.checksum()
+    with tracing.span("checksum"):
+        return diskmap.checksum()
 
 
 # PART 1
@@ -215,7 +227,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == 6330095022244
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -235,7 +247,7 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == 6359491814941
+    assert result == ANSWER2
     print("= " * 32)
 
 
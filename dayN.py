@@ -11,6 +11,9 @@ import math
 import re
 
 INPUTFILE = "input.txt"
+ANSWER1 = -1
+ANSWER2 = -1
+BLANK_LINES = False
 
 SAMPLE_CASES = [
     (
@@ -74,7 +77,7 @@ def example1() -> None:
     """Run example for problem with input arguments."""
     print("EXAMPLE 1:")
     for text, expected in SAMPLE_CASES:
-        lines = load_text(text)
+        lines = load_text(text, blank_lines=BLANK_LINES)
         result = solve(lines)
         print(f"'{text}' -> {result} (expected {expected})")
         assert result == expected
@@ -84,7 +87,7 @@ def part1(lines: Lines) -> None:
     print("PART 1:")
     result = solve(lines)
     print(f"result is {result}")
-    assert result == -1
+    assert result == ANSWER1
     print("= " * 32)
 
 
@@ -94,7 +97,7 @@ def example2() -> None:
     """Run example for problem with input arguments."""
     print("EXAMPLE 2:")
     for text, expected in SAMPLE_CASES2:
-        lines = load_text(text)
+        lines = load_text(text, blank_lines=BLANK_LINES)
         result = solve2(lines)
         print(f"'{text}' -> {result} (expected {expected})")
         assert result == expected
@@ -104,13 +107,13 @@ def part2(lines: Lines) -> None:
     print("PART 2:")
     result = solve2(lines)
     print(f"result is {result}")
-    assert result == -1
+    assert result == ANSWER2
     print("= " * 32)
 
 
 if __name__ == "__main__":
     example1()
-    input_lines = load_input(INPUTFILE)
+    input_lines = load_input(INPUTFILE, blank_lines=BLANK_LINES)
     part1(input_lines)
     example2()
     part2(input_lines)
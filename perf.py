@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for measuring the performance of the daily solutions.
+
+The day scripts live in their own folders and aren't importable as a
+package, so this module loads them by path and wraps the bookkeeping
+(timing, peak memory, input hashing, git revision) that the benchmarking
+tools all need.
+"""
+from typing import Any, Callable, Optional
+from types import ModuleType
+from pathlib import Path
+from dataclasses import dataclass
+import importlib.util
+import subprocess
+import sys
+import hashlib
+import time
+import tracemalloc
+
+
+BASE_DIR = Path(__file__).parent
+
+PARTS = (1, 2)
+SOLVERS = {1: "solve", 2: "solve2"}
+
+
+def day_dir(day: int) -> Path:
+    return BASE_DIR / f"day{day}"
+
+
+def load_day(day: int) -> ModuleType:
+    """Import the solution script for the given day, without running it."""
+    path = day_dir(day) / f"day{day}.py"
+    if not path.exists():
+        raise FileNotFoundError(f"No solution script for day {day} ({path})")
+    spec = importlib.util.spec_from_file_location(f"day{day}", path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered first, so the script's functions can be pickled, for
+    # process pools; and the script's folder goes on the path, so worker
+    # processes that are spawned rather than forked can import it too.
+    sys.modules[spec.name] = module
+    if str(path.parent) not in sys.path:
+        sys.path.append(str(path.parent))
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_solver(module: ModuleType, part: int, name: str = "") -> Callable:
+    """Return the named solver function of a day module, or the default
+    solver (solve or solve2) for the given part."""
+    name = name or SOLVERS[part]
+    func = getattr(module, name, None)
+    if not callable(func):
+        raise AttributeError(f"{module.__name__} has no solver named '{name}'")
+    return func
+
+
+def load_day_input(module: ModuleType, day: int) -> list[str]:
+    """Load the real puzzle input for a day, the way its script does."""
+    return module.load_input(
+        str(day_dir(day) / module.INPUTFILE),
+        blank_lines=getattr(module, "BLANK_LINES", False)
+    )
+
+
+def load_day_text(module: ModuleType, text: str) -> list[str]:
+    """Load an example input for a day, the way its script does."""
+    return module.load_text(text, blank_lines=getattr(module, "BLANK_LINES", False))
+
+
+def input_hash(lines: list[str]) -> str:
+    digest = hashlib.sha256("\n".join(lines).encode())
+    return digest.hexdigest()[:16]
+
+
+def git_commit() -> str:
+    """Return the commit hash of the working tree (suffixed with '+' if there
+    are uncommitted changes), or an empty string outside of a git checkout."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return commit + ("+" if dirty else "")
+
+
+@dataclass
+class Measurement:
+    result: Any
+    seconds: float
+    peak_kb: Optional[float] = None
+
+
+def measure(func: Callable, *args, memory: bool = False, **kwargs) -> Measurement:
+    """Call func(*args, **kwargs) and time it.  If memory is True, the peak
+    Python heap usage is tracked too, which slows the call down noticeably."""
+    if memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak_kb = None
+        if memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak_kb = peak / 1024
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return Measurement(result, seconds, peak_kb)
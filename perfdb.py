@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Keep a history of benchmark runs, and compare them across commits.
+
+    ./perfdb.py record -d 1 -d 9 --repeat 5
+    ./perfdb.py compare HEAD~3 HEAD
+    ./perfdb.py show -d 9
+
+Every timed run of a day's solver is appended to a local SQLite database,
+tagged with the git commit it ran against, so timings from different
+commits can be compared with a significance test instead of by eye.
+"""
+import sys
+from typing import Optional
+from pathlib import Path
+from collections import defaultdict
+from datetime import datetime
+import argparse
+import logging
+import math
+import sqlite3
+import statistics
+import subprocess
+
+import perf
+
+
+DB_FILE = perf.BASE_DIR / "results" / "perf.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    part INTEGER NOT NULL,
+    variant TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    peak_kb REAL
+);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs (commit_hash);
+"""
+
+SIGNIFICANCE = 0.05
+
+
+logging.basicConfig(format="%(message)s", stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UsageError(Exception):
+    """A UsageError is raised when there's an issue parsing the command-line options."""
+
+
+def connect(path: Path = DB_FILE) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# Recording
+
+def record_day(
+    conn: sqlite3.Connection,
+    day: int,
+    parts: list[int],
+    repeat: int = 5,
+    solver_name: str = "",
+    memory: bool = True,
+) -> None:
+    module = perf.load_day(day)
+    lines = perf.load_day_input(module, day)
+    digest = perf.input_hash(lines)
+    commit = perf.git_commit()
+    stamp = datetime.now().isoformat(timespec="seconds")
+
+    for part in parts:
+        solver = perf.get_solver(module, part, solver_name)
+        # Tracking memory slows the solver down, so it gets a run of its own.
+        peak_kb = perf.measure(solver, lines, memory=True).peak_kb if memory else None
+        times = [perf.measure(solver, lines).seconds for _ in range(repeat)]
+        conn.executemany(
+            "INSERT INTO runs (timestamp, commit_hash, day, part, variant,"
+            " input_hash, seconds, peak_kb) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (stamp, commit, day, part, solver.__name__, digest, seconds, peak_kb)
+                for seconds in times
+            ],
+        )
+        conn.commit()
+        logger.info(
+            f"day {day} part {part} {solver.__name__}: "
+            f"{statistics.mean(times):.4f}s mean of {repeat}"
+            + (f", {peak_kb:.0f} KB peak" if peak_kb is not None else "")
+        )
+
+
+# Comparison
+
+def resolve_rev(rev: str) -> str:
+    """Turn a git revision into the commit hash stored in the database.
+    A trailing '+' refers to runs made with uncommitted changes on top."""
+    dirty = rev.endswith("+")
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--verify", rev.rstrip("+") + "^{commit}"],
+            cwd=perf.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except subprocess.CalledProcessError as exc:
+        raise UsageError(f"Unknown revision '{rev}'") from exc
+    return commit + ("+" if dirty else "")
+
+
+def load_times(conn: sqlite3.Connection, commit: str) -> dict[tuple, list[float]]:
+    times = defaultdict(list)
+    rows = conn.execute(
+        "SELECT day, part, variant, input_hash, seconds FROM runs WHERE commit_hash = ?",
+        (commit,),
+    )
+    for day, part, variant, digest, seconds in rows:
+        times[(day, part, variant, digest)].append(seconds)
+    return times
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """The regularized incomplete beta function I_x(a, b), evaluated with
+    Lentz's continued fraction."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - betainc(b, a, 1.0 - x)
+
+    tiny = 1e-300
+    log_front = (
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+        + a * math.log(x) + b * math.log(1.0 - x)
+    )
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 200):
+        for num in (
+            m * (b - m) * x / ((a + 2*m - 1) * (a + 2*m)),
+            -(a + m) * (a + b + m) * x / ((a + 2*m) * (a + 2*m + 1)),
+        ):
+            d = 1.0 + num * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + num / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return math.exp(log_front) * result / a
+
+
+def welch_p_value(xs: list[float], ys: list[float]) -> Optional[float]:
+    """Two-sided p-value of Welch's t-test for a difference in the means."""
+    if len(xs) < 2 or len(ys) < 2:
+        return None
+    vx = statistics.variance(xs) / len(xs)
+    vy = statistics.variance(ys) / len(ys)
+    if vx + vy == 0:
+        return 0.0 if statistics.mean(xs) != statistics.mean(ys) else 1.0
+    t = (statistics.mean(xs) - statistics.mean(ys)) / math.sqrt(vx + vy)
+    df = (vx + vy) ** 2 / (vx**2 / (len(xs) - 1) + vy**2 / (len(ys) - 1))
+    return betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def compare(conn: sqlite3.Connection, rev1: str, rev2: str) -> str:
+    commit1, commit2 = resolve_rev(rev1), resolve_rev(rev2)
+    before, after = load_times(conn, commit1), load_times(conn, commit2)
+    if not before:
+        raise UsageError(f"No runs recorded for {rev1} ({commit1[:10]})")
+    if not after:
+        raise UsageError(f"No runs recorded for {rev2} ({commit2[:10]})")
+
+    lines = [
+        f"{rev1} ({commit1[:10]}) -> {rev2} ({commit2[:10]})",
+        "",
+        f"{'day':>3} {'part':>4}  {'variant':<16} {'before':>9} {'after':>9}"
+        f" {'delta':>8} {'p':>7}",
+        "-" * 62,
+    ]
+    for key in sorted(set(before) | set(after)):
+        day, part, variant, _ = key
+        if key not in before or key not in after:
+            missing = rev1 if key not in before else rev2
+            lines.append(f"{day:>3} {part:>4}  {variant:<16} (no runs for {missing})")
+            continue
+        mean1, mean2 = statistics.mean(before[key]), statistics.mean(after[key])
+        delta = 100.0 * (mean2 - mean1) / mean1
+        p = welch_p_value(before[key], after[key])
+        p_text = f"{p:7.3f}" if p is not None else "      -"
+        flag = " *" if p is not None and p < SIGNIFICANCE else ""
+        lines.append(
+            f"{day:>3} {part:>4}  {variant:<16} {mean1:9.4f} {mean2:9.4f}"
+            f" {delta:+7.1f}% {p_text}{flag}"
+        )
+    lines.append("")
+    lines.append(f"* significant at p < {SIGNIFICANCE} (Welch's t-test)")
+    return "\n".join(lines)
+
+
+def show(conn: sqlite3.Connection, days: list[int]) -> str:
+    query = (
+        "SELECT commit_hash, day, part, variant, COUNT(*), AVG(seconds),"
+        " MAX(peak_kb), MAX(timestamp) FROM runs"
+    )
+    if days:
+        query += f" WHERE day IN ({', '.join('?' * len(days))})"
+    query += " GROUP BY commit_hash, day, part, variant ORDER BY MAX(timestamp), day, part"
+    lines = [
+        f"{'commit':<11} {'day':>3} {'part':>4}  {'variant':<16} {'runs':>4}"
+        f" {'mean':>9} {'peak KB':>9}  recorded",
+        "-" * 80,
+    ]
+    for commit, day, part, variant, count, mean, peak_kb, stamp in conn.execute(query, days):
+        peak_text = f"{peak_kb:9.0f}" if peak_kb is not None else "        -"
+        lines.append(
+            f"{commit[:10]:<11} {day:>3} {part:>4}  {variant:<16} {count:>4}"
+            f" {mean:9.4f} {peak_text}  {stamp}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Record benchmark runs and compare them across commits."
+    )
+    parser.add_argument(
+        "--db", type=Path, default=DB_FILE,
+        help="The SQLite database file",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="Time solvers and record the results")
+    rec.add_argument(
+        "--day", "-d", type=int, action="append", required=True,
+        help="The day to benchmark (may be repeated)",
+    )
+    rec.add_argument(
+        "--part", "-p", type=int, action="append", choices=perf.PARTS,
+        help="The part to benchmark (default: both)",
+    )
+    rec.add_argument(
+        "--solver",
+        help="Name of the solver function to time (default: solve or solve2)",
+    )
+    rec.add_argument(
+        "--repeat", type=int, default=5,
+        help="Number of timed runs per part",
+    )
+    rec.add_argument(
+        "--no-memory", action="store_true",
+        help="Don't measure peak memory usage",
+    )
+
+    cmp = commands.add_parser("compare", help="Compare the runs for two commits")
+    cmp.add_argument("rev1", help="The baseline git revision")
+    cmp.add_argument("rev2", help="The git revision to compare against it")
+
+    shw = commands.add_parser("show", help="Summarize the recorded runs")
+    shw.add_argument(
+        "--day", "-d", type=int, action="append", default=[],
+        help="Only show runs for this day (may be repeated)",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    opt = parse_args()
+    conn = connect(opt.db)
+    try:
+        if opt.command == "record":
+            if perf.git_commit().endswith("+"):
+                logger.warning("Working tree has uncommitted changes; "
+                               "runs are recorded against '<commit>+'")
+            for day in opt.day:
+                record_day(
+                    conn, day, opt.part or list(perf.PARTS),
+                    repeat=opt.repeat, solver_name=opt.solver or "",
+                    memory=not opt.no_memory,
+                )
+        elif opt.command == "compare":
+            print(compare(conn, opt.rev1, opt.rev2))
+        elif opt.command == "show":
+            print(show(conn, opt.day))
+    except UsageError as exc:
+        logger.error(f"Error: {exc}")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
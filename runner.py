@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Run a day's solution against its examples and its puzzle input, and report
+the answers, the expected answers and the timings.
+
+    ./runner.py -d 5
+    ./runner.py -d 5 -d 9 --json > runs.jsonl
+
+With --json, one JSON record is written per example and part, instead of
+the human-readable table.  Each record holds the answer, the expected
+answer, whether they match, the load time, the solve time and the peak
+memory use, so runs can be collected without scraping the day scripts'
+output.  The load time is only the time to read the input into lines, the
+way the day script does; each day's own parsing happens inside its solver,
+so it's part of the solve time.
+
+The expected answers come from each day script's SAMPLE_CASES,
+SAMPLE_CASES2, ANSWER1 and ANSWER2 (see dayN.py).
+
+With --timeout or --progress, each solver runs in a worker process, which
+is killed if it runs over its time budget.  A solver that takes a
+"progress" keyword argument is handed a callback to call with the number of
+items (equations, candidate positions, ...) it has finished, so its
+throughput can be shown while it runs.  The callback also raises Cancelled
+once the time budget is spent, so cooperative solvers stop cleanly.  The
+budget only covers the timed run; the second run, to measure peak memory,
+has a budget of its own, and if it runs over, the answer is still reported,
+without the peak memory.
+"""
+import sys
+from typing import Any, Callable, Optional
+from types import ModuleType
+from dataclasses import dataclass, asdict
+import argparse
+import inspect
+import json
+import logging
+import multiprocessing
+import time
+
+import perf
+
+
+logging.basicConfig(format="%(message)s", stream=sys.stderr, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds to wait, after the time budget is spent, for a solver to notice
+# that it has been cancelled, before its worker process is killed.
+GRACE_SECONDS = 2.0
+
+# Seconds between progress reports.
+PROGRESS_INTERVAL = 1.0
+
+
+class Cancelled(Exception):
+    """Cancelled is raised by the progress callback once a solver's time
+    budget has been spent."""
+
+
+@dataclass
+class Record:
+    day: int
+    part: int
+    case: str
+    answer: Any
+    expected: Any
+    passed: Optional[bool]
+    load_ms: float
+    solve_ms: Optional[float]
+    peak_kb: Optional[float]
+    error: Optional[str] = None
+    items: Optional[int] = None
+
+    def __str__(self) -> str:
+        if self.error:
+            status = "ERROR"
+        else:
+            status = {True: "ok", False: "FAIL", None: "?"}[self.passed]
+        solve_ms = f"{self.solve_ms:10.1f}" if self.solve_ms is not None else " " * 10
+        peak_kb = f"{self.peak_kb:10.0f}" if self.peak_kb is not None else " " * 10
+        line = (
+            f"day {self.day:<2} part {self.part}  {self.case:<10} {status:<5}"
+            f" {str(self.answer):>18}  {self.load_ms:8.1f} {solve_ms} {peak_kb}"
+        )
+        if self.error:
+            line += f"\n    {self.error}"
+        elif self.passed is False:
+            line += f"\n    expected {self.expected}"
+        return line
+
+
+HEADER = (
+    f"{'':<6} {'':<6}  {'case':<10} {'':<5} {'answer':>18}"
+    f"  {' load ms':>8} {'solve ms':>10} {'peak KB':>10}"
+)
+
+
+def accepts_progress(solver: Callable) -> bool:
+    return "progress" in inspect.signature(solver).parameters
+
+
+def solve_case(
+    solver: Callable,
+    lines: list[str],
+    memory: bool = True,
+    progress: Optional[Callable[[int], None]] = None,
+) -> tuple[Any, float, Optional[float]]:
+    """Solve one input, returning the answer, the solve time in ms and the
+    peak memory use in KB."""
+    kwargs = {"progress": progress} if progress and accepts_progress(solver) else {}
+    timed = perf.measure(solver, lines, **kwargs)
+    peak_kb = None
+    if memory:
+        peak_kb = perf.measure(solver, lines, memory=True).peak_kb
+    return timed.result, timed.seconds * 1000, peak_kb
+
+
+def _worker(day, part, lines, memory, budget, counter, conn) -> None:
+    """Entry point of the worker process that runs a single solver.
+
+    The timed run is sent as soon as it's done, and only it is held to the
+    time budget.  The second run, to measure peak memory, is sent after it,
+    as ("memory", peak_kb)."""
+    deadline = time.monotonic() + budget if budget else None
+
+    def progress(count: int = 1) -> None:
+        counter.value += count
+        if deadline and time.monotonic() > deadline:
+            raise Cancelled()
+
+    solver = perf.get_solver(perf.load_day(day), part)
+    try:
+        try:
+            answer, solve_ms, _ = solve_case(solver, lines, memory=False, progress=progress)
+        except Cancelled:
+            conn.send(("timeout", None))
+            return
+        except Exception as exc:  # pylint: disable=broad-except
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+            return
+        conn.send(("ok", (answer, solve_ms, None)))
+        if memory:
+            try:
+                peak_kb = perf.measure(solver, lines, memory=True).peak_kb
+            except Exception:  # pylint: disable=broad-except
+                peak_kb = None
+            conn.send(("memory", peak_kb))
+    finally:
+        conn.close()
+
+
+def _wait(recv, proc, start: float, timeout: Optional[float], tick=None):
+    """Wait for the next message from a worker, calling tick(elapsed) every
+    PROGRESS_INTERVAL.  Returns None if the worker runs past the timeout."""
+    while True:
+        if recv.poll(PROGRESS_INTERVAL):
+            try:
+                return recv.recv()
+            except EOFError:
+                return "error", "worker exited without a result"
+        elapsed = time.monotonic() - start
+        if tick:
+            tick(elapsed)
+        if timeout and elapsed > timeout + GRACE_SECONDS:
+            return None
+        if not proc.is_alive() and not recv.poll():
+            return "error", f"worker exited with code {proc.exitcode}"
+
+
+def show_progress(label: str, items: int, elapsed: float) -> None:
+    rate = items / elapsed if elapsed else 0.0
+    text = f"{label}: {items} items, {rate:.1f} items/s, {elapsed:.0f}s"
+    if sys.stderr.isatty():
+        print(f"\r{text}\033[K", end="", file=sys.stderr, flush=True)
+    else:
+        logger.info(text)
+
+
+def solve_in_worker(
+    day: int,
+    part: int,
+    lines: list[str],
+    label: str,
+    memory: bool = True,
+    timeout: Optional[float] = None,
+    progress: bool = False,
+) -> tuple[str, Any, int]:
+    """Run a solver in a worker process, killing it if it runs past the
+    timeout.  Returns the status ("ok", "timeout" or "error"), the result of
+    solve_case() (or the error message), and the number of items reported
+    through the progress callback."""
+    ctx = multiprocessing.get_context()
+    counter = ctx.Value("q", 0, lock=False)
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(
+        target=_worker,
+        args=(day, part, lines, memory, timeout, counter, send),
+        daemon=True,
+    )
+    start = time.monotonic()
+    proc.start()
+    send.close()
+
+    reported = False
+
+    def tick(elapsed: float) -> None:
+        nonlocal reported
+        if progress:
+            show_progress(label, counter.value, elapsed)
+            reported = True
+
+    status, result = _wait(recv, proc, start, timeout, tick) or ("timeout", None)
+    if status == "ok" and memory:
+        # The memory run gets a budget of its own, and if it runs over, the
+        # answer still stands, without a peak memory figure.
+        message = _wait(recv, proc, time.monotonic(), timeout)
+        if message and message[0] == "memory":
+            answer, solve_ms, _ = result
+            result = (answer, solve_ms, message[1])
+
+    if proc.is_alive():
+        proc.kill()
+    proc.join()
+    if reported and sys.stderr.isatty():
+        print(file=sys.stderr)
+    return status, result, counter.value
+
+
+def run_case(
+    module: ModuleType,
+    day: int,
+    part: int,
+    case: str,
+    text: Optional[str],
+    expected: Any,
+    memory: bool = True,
+    timeout: Optional[float] = None,
+    progress: bool = False,
+) -> Record:
+    """Solve one example (given as text) or the puzzle input (text is None)."""
+    if text is None:
+        loaded = perf.measure(perf.load_day_input, module, day)
+    else:
+        loaded = perf.measure(perf.load_day_text, module, text)
+    lines = loaded.result
+    load_ms = loaded.seconds * 1000
+
+    items = None
+    if timeout or progress:
+        label = f"day {day} part {part} {case}"
+        status, result, items = solve_in_worker(
+            day, part, lines, label, memory=memory, timeout=timeout, progress=progress
+        )
+        if not accepts_progress(perf.get_solver(module, part)):
+            items = None
+        if status == "timeout":
+            return Record(day, part, case, None, expected, False, load_ms, None, None,
+                          error=f"timed out after {timeout}s", items=items)
+        if status == "error":
+            return Record(day, part, case, None, expected, False, load_ms, None, None,
+                          error=result, items=items)
+    else:
+        try:
+            result = solve_case(perf.get_solver(module, part), lines, memory=memory)
+        except Exception as exc:  # pylint: disable=broad-except
+            return Record(day, part, case, None, expected, False, load_ms, None, None,
+                          error=f"{type(exc).__name__}: {exc}")
+
+    answer, solve_ms, peak_kb = result
+    passed = None if expected is None else answer == expected
+    return Record(day, part, case, answer, expected, passed, load_ms,
+                  solve_ms, peak_kb, items=items)
+
+
+def run_day(
+    day: int,
+    parts: list[int],
+    examples: bool = True,
+    puzzle: bool = True,
+    memory: bool = True,
+    timeout: Optional[float] = None,
+    progress: bool = False,
+):
+    """Generate a Record for each example and for the puzzle input, for
+    each of the given parts of the day's puzzle."""
+    module = perf.load_day(day)
+    for part in parts:
+        if examples:
+            cases = module.SAMPLE_CASES if part == 1 else module.SAMPLE_CASES2
+            for i, (text, expected) in enumerate(cases, start=1):
+                yield run_case(module, day, part, f"example {i}", text, expected,
+                               memory=memory, timeout=timeout, progress=progress)
+        if puzzle:
+            expected = getattr(module, f"ANSWER{part}", None)
+            yield run_case(module, day, part, "input", None, expected,
+                           memory=memory, timeout=timeout, progress=progress)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run a day's solution against its examples and input."
+    )
+    parser.add_argument(
+        "--day", "-d", type=int, action="append", required=True,
+        help="The day to run (may be repeated)",
+    )
+    parser.add_argument(
+        "--part", "-p", type=int, action="append", choices=perf.PARTS,
+        help="The part to run (default: both)",
+    )
+    parser.add_argument(
+        "--json", action="store_true",
+        help="Write one JSON record per example and part",
+    )
+    cases = parser.add_mutually_exclusive_group()
+    cases.add_argument(
+        "--examples-only", action="store_true",
+        help="Only run the examples",
+    )
+    cases.add_argument(
+        "--no-examples", action="store_true",
+        help="Only run the puzzle input",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="Don't measure peak memory (which takes a second run of each solver)",
+    )
+    parser.add_argument(
+        "--timeout", type=float,
+        help="Time budget in seconds for each part, per example or input",
+    )
+    parser.add_argument(
+        "--progress", action="store_true",
+        help="Show each solver's progress while it runs",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    opt = parse_args()
+    if not opt.json:
+        print(HEADER)
+
+    failures = 0
+    for day in opt.day:
+        records = run_day(
+            day, opt.part or list(perf.PARTS),
+            examples=not opt.no_examples,
+            puzzle=not opt.examples_only,
+            memory=not opt.no_memory,
+            timeout=opt.timeout,
+            progress=opt.progress,
+        )
+        for record in records:
+            if record.error or record.passed is False:
+                failures += 1
+            if opt.json:
+                print(json.dumps(asdict(record)), flush=True)
+            else:
+                print(record, flush=True)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
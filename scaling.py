@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Measure how a day's solution scales with the size of its input.
+
+The solver for one part of a day's puzzle is run against synthetic inputs
+of increasing size, and the timings are fitted to both a power law
+(t ~ n^k) and an exponential (t ~ b^n).  For example,
+
+    ./scaling.py -d 5 -p 2
+    ./scaling.py -d 7 -p 2 --sizes 2,3,4,5,6,7,8,9
+
+Every run is saved as a JSON file under results/scaling/, so the effect of
+an algorithmic change can be shown as a change in the fitted exponent.
+"""
+import sys
+from typing import Callable
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from datetime import datetime
+import argparse
+import json
+import logging
+import math
+import random
+import string
+
+import perf
+
+
+RESULTS_DIR = perf.BASE_DIR / "results" / "scaling"
+
+
+logging.basicConfig(format="%(message)s", stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Synthetic input generators
+#
+# Each generator takes a size n and a seeded random number generator, and
+# returns the lines of a puzzle input.  What n measures depends on the day,
+# and is described by the Generator's unit.
+
+Lines = list[str]
+
+
+@dataclass
+class Generator:
+    func: Callable[[int, random.Random], Lines]
+    unit: str
+    sizes: list[int]
+
+
+def geometric(start: int, stop: int, factor: float = 2) -> list[int]:
+    sizes = []
+    size = start
+    while size <= stop:
+        sizes.append(int(size))
+        size *= factor
+    return sizes
+
+
+def gen_day1(n: int, rng: random.Random) -> Lines:
+    return [
+        f"{rng.randrange(10000, 100000)}   {rng.randrange(10000, 100000)}"
+        for _ in range(n)
+    ]
+
+
+def gen_day2(n: int, rng: random.Random) -> Lines:
+    lines = []
+    for _ in range(n):
+        level = rng.randrange(1, 50)
+        levels = [level]
+        step = rng.choice((1, -1))
+        for _ in range(rng.randrange(5, 9) - 1):
+            level += step * rng.randrange(0, 5)
+            levels.append(level)
+        lines.append(" ".join(map(str, levels)))
+    return lines
+
+
+def gen_day3(n: int, rng: random.Random) -> Lines:
+    tokens = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.7:
+            tokens.append(f"mul({rng.randrange(1, 1000)},{rng.randrange(1, 1000)})")
+        elif kind < 0.8:
+            tokens.append("do()")
+        elif kind < 0.9:
+            tokens.append("don't()")
+        else:
+            tokens.append(f"mul({rng.randrange(1, 1000)}, {rng.randrange(1, 1000)})")
+        tokens.append("".join(rng.choices(string.punctuation + "mul", k=rng.randrange(1, 8))))
+    text = "".join(tokens)
+    return [text[i:i+3000] for i in range(0, len(text), 3000)]
+
+
+def gen_day4(n: int, rng: random.Random) -> Lines:
+    return ["".join(rng.choices("XMAS", k=n)) for _ in range(n)]
+
+
+def gen_day5(n: int, rng: random.Random) -> Lines:
+    pages = rng.sample(range(10, 10 + 10 * n), n)
+    rules = [
+        f"{pages[i]}|{pages[j]}" for i in range(n) for j in range(i + 1, n)
+    ]
+    rng.shuffle(rules)
+    updates = []
+    for _ in range(20):
+        update = list(pages)
+        rng.shuffle(update)
+        updates.append(",".join(map(str, update)))
+    return rules + [""] + updates
+
+
+def gen_day6(n: int, rng: random.Random) -> Lines:
+    rows = [
+        ["#" if rng.random() < 0.05 else "." for _ in range(n)]
+        for _ in range(n)
+    ]
+    rows[n // 2][n // 2] = "^"
+    return ["".join(row) for row in rows]
+
+
+def gen_day7(n: int, rng: random.Random) -> Lines:
+    # No equation can be satisfied, so every operator combination is tried.
+    return [
+        "1: " + " ".join(str(rng.randrange(2, 10)) for _ in range(n))
+        for _ in range(10)
+    ]
+
+
+def gen_day8(n: int, rng: random.Random) -> Lines:
+    rows = [["."] * n for _ in range(n)]
+    for _ in range(n):
+        rows[rng.randrange(n)][rng.randrange(n)] = rng.choice(string.ascii_letters[:8])
+    return ["".join(row) for row in rows]
+
+
+def gen_day9(n: int, rng: random.Random) -> Lines:
+    files = rng.choices("123456789", k=n + 1)
+    gaps = rng.choices("0123456789", k=n)
+    return ["".join(f + g for f, g in zip(files, gaps)) + files[-1]]
+
+
+GENERATORS: dict[int, Generator] = {
+    1: Generator(gen_day1, "rows", geometric(1000, 512000)),
+    2: Generator(gen_day2, "reports", geometric(1000, 512000)),
+    3: Generator(gen_day3, "instructions", geometric(1000, 512000)),
+    4: Generator(gen_day4, "grid rows and columns", geometric(16, 512)),
+    5: Generator(gen_day5, "pages per update", geometric(4, 128)),
+    6: Generator(gen_day6, "grid rows and columns", geometric(16, 256)),
+    7: Generator(gen_day7, "operands per equation", list(range(2, 12))),
+    8: Generator(gen_day8, "grid rows and columns", geometric(16, 1024)),
+    9: Generator(gen_day9, "files", geometric(1000, 64000)),
+}
+
+
+# Curve fitting
+
+@dataclass
+class Fit:
+    model: str
+    coefficient: float
+    r2: float
+
+    def __str__(self) -> str:
+        if self.model == "power":
+            return f"t ~ n^{self.coefficient:.2f}  (R^2 = {self.r2:.3f})"
+        return f"t ~ {self.coefficient:.2f}^n  (R^2 = {self.r2:.3f})"
+
+
+def linear_fit(xs: list[float], ys: list[float]) -> tuple[float, float]:
+    """Least-squares fit of y = a + b*x.  Returns the slope b and R^2."""
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    slope = sxy / sxx
+    r2 = (sxy * sxy) / (sxx * syy) if syy else 1.0
+    return slope, r2
+
+
+def fit_growth(sizes: list[int], seconds: list[float]) -> list[Fit]:
+    """Fit the timings to a power law and to an exponential, best fit first."""
+    log_t = [math.log(t) for t in seconds]
+    k, r2_power = linear_fit([math.log(n) for n in sizes], log_t)
+    s, r2_exp = linear_fit([float(n) for n in sizes], log_t)
+    fits = [Fit("power", k, r2_power), Fit("exponential", math.exp(s), r2_exp)]
+    return sorted(fits, key=lambda fit: fit.r2, reverse=True)
+
+
+# Driver
+
+@dataclass
+class Sample:
+    size: int
+    seconds: float
+
+
+def run_series(
+    solver: Callable,
+    generator: Generator,
+    sizes: list[int],
+    repeat: int = 3,
+    max_seconds: float = 10.0,
+    seed: int = 2024,
+) -> list[Sample]:
+    """Time the solver at each size, keeping the best of several runs.
+    The series stops early once a single run takes longer than max_seconds."""
+    samples = []
+    for size in sizes:
+        lines = generator.func(size, random.Random(seed))
+        best = None
+        for _ in range(repeat):
+            seconds = perf.measure(solver, lines).seconds
+            best = seconds if best is None else min(best, seconds)
+            if seconds > max_seconds:
+                break
+        samples.append(Sample(size, best))
+        logger.info(f"  n = {size:>8}  {best:10.4f}s")
+        if best > max_seconds:
+            logger.info(f"  (stopping: {best:.1f}s exceeds {max_seconds}s)")
+            break
+    return samples
+
+
+def report(samples: list[Sample], fits: list[Fit], unit: str) -> str:
+    lines = [f"{'n':>10}  {'seconds':>10}  {'ratio':>7}", "-" * 31]
+    prev = None
+    for sample in samples:
+        ratio = f"{sample.seconds / prev:7.2f}" if prev else " " * 7
+        lines.append(f"{sample.size:>10}  {sample.seconds:10.4f}  {ratio}")
+        prev = sample.seconds
+    lines.append(f"(n = {unit})")
+    lines.append("")
+    for fit in fits:
+        lines.append(f"{fit.model:>12}: {fit}")
+    return "\n".join(lines)
+
+
+def save_run(
+    day: int, part: int, variant: str, unit: str,
+    samples: list[Sample], fits: list[Fit]
+) -> Path:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    path = RESULTS_DIR / f"day{day}-part{part}-{variant}-{stamp}.json"
+    record = {
+        "day": day,
+        "part": part,
+        "variant": variant,
+        "unit": unit,
+        "commit": perf.git_commit(),
+        "timestamp": stamp,
+        "samples": [asdict(sample) for sample in samples],
+        "fits": [asdict(fit) for fit in fits],
+    }
+    path.write_text(json.dumps(record, indent=2) + "\n")
+    return path
+
+
+def parse_sizes(text: str) -> list[int]:
+    return [int(val) for val in text.split(",") if val.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fit the growth rate of a solution's running time."
+    )
+    parser.add_argument(
+        "--day", "-d", type=int, required=True, choices=sorted(GENERATORS),
+        help="The day of the puzzle",
+    )
+    parser.add_argument(
+        "--part", "-p", type=int, default=1, choices=perf.PARTS,
+        help="The part of the puzzle to solve",
+    )
+    parser.add_argument(
+        "--solver",
+        help="Name of the solver function to time (default: solve or solve2)",
+    )
+    parser.add_argument(
+        "--sizes", type=parse_sizes,
+        help="Comma-separated input sizes (default depends on the day)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="Number of runs per size; the fastest is kept",
+    )
+    parser.add_argument(
+        "--max-seconds", type=float, default=10.0,
+        help="Stop the series once a run takes longer than this",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=2024,
+        help="Seed for the synthetic input generator",
+    )
+    parser.add_argument(
+        "--no-save", action="store_true",
+        help="Don't save the results",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    opt = parse_args()
+    module = perf.load_day(opt.day)
+    solver = perf.get_solver(module, opt.part, opt.solver)
+    generator = GENERATORS[opt.day]
+    sizes = opt.sizes or generator.sizes
+
+    logger.info(f"Day {opt.day} part {opt.part} ({solver.__name__}):")
+    samples = run_series(
+        solver, generator, sizes,
+        repeat=opt.repeat, max_seconds=opt.max_seconds, seed=opt.seed
+    )
+    if len(samples) < 3:
+        logger.error("Need at least three sizes to fit a growth rate")
+        return 1
+
+    fits = fit_growth([s.size for s in samples], [s.seconds for s in samples])
+    print()
+    print(report(samples, fits, generator.unit))
+
+    if not opt.no_save:
+        path = save_run(opt.day, opt.part, solver.__name__, generator.unit, samples, fits)
+        logger.info(f"\nWrote {path.relative_to(perf.BASE_DIR)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
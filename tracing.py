@@ -0,0 +1,110 @@
+"""
+Lightweight event tracing for the daily solutions, in Chrome trace format.
+
+Wrap the phases of a solution in spans,
+
+    with tracing.span("parse"):
+        grid = parse_input(lines)
+
+or decorate whole functions with @tracing.traced().  Tracing is enabled by
+setting the AOC_TRACE environment variable to the name of the output file,
+
+    AOC_TRACE=day6.trace.json ./day6.py
+
+and the trace is written when the program exits.  Load it in
+chrome://tracing or https://ui.perfetto.dev to see the timeline.
+
+When tracing is disabled, span() hands back a shared do-nothing context
+manager and traced() returns the function undecorated, so instrumented code
+runs at full speed.  Because of that, tracing must be enabled (either with
+the environment variable or with enable()) before the instrumented modules
+are imported, and instrumented code should call tracing.span(), not a copy
+of it imported with "from tracing import span".
+"""
+from typing import Any, Callable, Optional
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = "AOC_TRACE"
+
+ENABLED = False
+
+_events: list[dict[str, Any]] = []
+_origin = time.perf_counter()
+_null = nullcontext()
+
+
+def _now_us() -> float:
+    return (time.perf_counter() - _origin) * 1e6
+
+
+@contextmanager
+def _span(name: str, **args):
+    start = _now_us()
+    try:
+        yield
+    finally:
+        event = {
+            "name": name,
+            "cat": "aoc",
+            "ph": "X",
+            "ts": start,
+            "dur": _now_us() - start,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        _events.append(event)
+
+
+def _null_span(name: str, **args):
+    return _null
+
+
+span = _null_span
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator that records each call of the function as a span."""
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def events() -> list[dict[str, Any]]:
+    return list(_events)
+
+
+def save(path: str) -> None:
+    """Write the events recorded so far to a Chrome trace JSON file."""
+    trace = {"traceEvents": _events, "displayTimeUnit": "ms"}
+    Path(path).write_text(json.dumps(trace))
+
+
+def enable(path: Optional[str] = None) -> None:
+    """Start recording spans.  If a path is given, the trace is saved there
+    when the program exits."""
+    global ENABLED, span
+    ENABLED = True
+    span = _span
+    if path:
+        atexit.register(save, path)
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])